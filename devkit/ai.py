@@ -11,107 +11,400 @@ os.environ['GLOG_minloglevel'] = '2'
 # issue: WARNING: All log messages before absl::InitializeLog() is called are written to STDERR
 # E0000 00:00:1759587309.577481   62098 alts_credentials.cc:93] ALTS creds ignored. Not running on GCP and untrusted ALTS is not enabled.
 
-import google.generativeai as genai
-from typing import Optional
+import functools
+import importlib.util
+import re
+from typing import TYPE_CHECKING, List, Optional
 from .storage import get_api_key
+from .ai_cache import LLMCache, get_cache, get_semantic_cache
 
+if TYPE_CHECKING:
+    # Only the batch helpers need asyncio at runtime, and they import it themselves
+    import asyncio
 
-def get_client() -> Optional[genai.GenerativeModel]:
+# The Gemini SDK (plus gRPC/protobuf) takes the better part of a second to
+# import, so it is only loaded when an AI call actually needs it.
+try:
+    AI_AVAILABLE = importlib.util.find_spec("google.generativeai") is not None
+except ImportError:
+    AI_AVAILABLE = False
+
+genai = None  # google.generativeai, set by _load_sdk()
+
+# Use the latest stable Gemini 2.5 Flash model
+MODEL_NAME = 'gemini-2.5-flash'
+# Tried once when MODEL_NAME is not found (404)
+FALLBACK_MODEL_NAME = 'models/gemini-pro'
+EMBEDDING_MODEL = 'models/embedding-001'
+
+NO_API_KEY_MESSAGE = "❌ API key not configured. Set GEMINI_API_KEY environment variable."
+
+# Set to False (devkit --no-cache) to always hit the API
+CACHE_ENABLED = True
+
+# Error classification: one regex scan, categories resolved in priority order
+_ERROR_RE = re.compile(
+    r'(?P<not_found>404|not found)|(?P<rate_limit>quota|limit)|(?P<auth>api_key|authentication)',
+    re.IGNORECASE
+)
+_ERROR_PRIORITY = ('not_found', 'rate_limit', 'auth')
+_ERROR_TABLE = {
+    'not_found': (
+        "❌ API error: Unable to access Gemini models. Error: {error}\n\n"
+        "Try: pip install --upgrade google-generativeai"
+    ),
+    'rate_limit': "⏱️ Rate limit reached. Wait a moment and try again.",
+    'auth': "🔑 Invalid API key. Run: devkit config --api-key <key>",
+}
+
+# Rough prompt budgets (1 token ~= 4 characters) so no input can blow up latency/cost
+COMMIT_DIFF_TOKEN_BUDGET = 2500
+QUERY_TOKEN_BUDGET = 250
+COMMAND_TOKEN_BUDGET = 250
+HISTORY_COMMAND_TOKEN_BUDGET = 100
+LOG_TOKEN_BUDGET = 12000
+
+# Output caps for prompts with short intended answers. Gemini 2.5 counts its
+# thinking tokens against this limit, so it leaves room beyond the answer itself.
+COMMIT_MAX_OUTPUT_TOKENS = 1024
+ROLLBACK_MAX_OUTPUT_TOKENS = 1024
+
+# Diff lines worth sending: file/hunk headers and changed lines (context lines are dropped)
+_DIFF_KEEP_PREFIXES = (
+    'diff --git', 'new file', 'deleted file', 'rename ', 'Binary files',
+    '@@', '+', '-',
+)
+
+# Batched requests run concurrently, capped to stay clear of Gemini 429s
+MAX_CONCURRENT_REQUESTS = 5
+REQUESTS_PER_MINUTE = 60
+
+
+def _load_sdk():
+    """Import the Gemini SDK on first use"""
+    global genai
+    if genai is None:
+        import google.generativeai
+        genai = google.generativeai
+    return genai
+
+
+@functools.lru_cache(maxsize=1)
+def _configure(api_key: str) -> None:
+    """Configure the SDK once per api key
+    
+    genai.configure() drops the SDK's cached service clients, and with them
+    the open gRPC channel, so it must not run again while the key is unchanged.
+    Every model built afterwards (including the fallback model and embedding
+    calls) shares that one long-lived channel.
+    """
+    _load_sdk().configure(api_key=api_key)
+
+
+@functools.lru_cache(maxsize=4)
+def _build_client(api_key: str, model_name: str = MODEL_NAME) -> "genai.GenerativeModel":
+    """Build a model once per api key / model pair"""
+    _configure(api_key)
+    return genai.GenerativeModel(model_name)
+
+
+def get_client() -> Optional["genai.GenerativeModel"]:
     """Get Gemini client with API key"""
     api_key = get_api_key()
     
     if not api_key:
         return None
     
-    genai.configure(api_key=api_key)
-    # Use the latest stable Gemini 2.5 Flash model
-    return genai.GenerativeModel('gemini-2.5-flash')
+    return _build_client(api_key)
 
 
-def ask_command(query: str) -> str:
-    """Ask AI to suggest a command for a query"""
+def reset_client() -> None:
+    """Drop memoized clients (e.g. after the API key changes, or in tests)"""
+    _build_client.cache_clear()
+    _configure.cache_clear()
+
+
+def _classify_error(e: Exception) -> Optional[str]:
+    """Return the highest-priority error category mentioned in an exception"""
+    found = {match.lastgroup for match in _ERROR_RE.finditer(str(e))}
+    for category in _ERROR_PRIORITY:
+        if category in found:
+            return category
+    return None
+
+
+def _api_error_message(e: Exception) -> str:
+    """User-facing message for a Gemini exception"""
+    category = _classify_error(e)
+    if category:
+        return _ERROR_TABLE[category].format(error=str(e))
+    return f"❌ API error: {str(e)}"
+
+
+def _handle_api_error(e: Exception, prompt: str) -> str:
+    """Turn a Gemini exception into a user-facing message"""
+    if _classify_error(e) == 'not_found':
+        # Try alternative model names
+        try:
+            alternative_client = _build_client(get_api_key(), FALLBACK_MODEL_NAME)
+            response = alternative_client.generate_content(prompt)
+            return response.text
+        except Exception:
+            pass
+    
+    return _api_error_message(e)
+
+
+def _embed(text: str) -> Optional[list]:
+    """Embed a query for the semantic cache (None if embedding fails)"""
+    try:
+        result = _load_sdk().embed_content(model=EMBEDDING_MODEL, content=text)
+        return result['embedding']
+    except Exception:
+        return None
+
+
+def _generation_config(max_output_tokens: Optional[int]) -> Optional[dict]:
+    """generate_content() config for an optional output cap"""
+    return {'max_output_tokens': max_output_tokens} if max_output_tokens else None
+
+
+def _call_gemini(prompt: str, semantic_kind: Optional[str] = None,
+                 semantic_text: Optional[str] = None,
+                 max_output_tokens: Optional[int] = None) -> str:
+    """Send a prompt to Gemini, serving repeated prompts from the response cache
+    
+    When semantic_kind is given, semantic_text is also matched against earlier
+    queries of the same kind so paraphrases reuse a cached answer.
+    """
+    cache_key = LLMCache.cache_key(MODEL_NAME, prompt)
+    
+    if CACHE_ENABLED:
+        cached = get_cache().get(cache_key)
+        if cached is not None:
+            return cached
+    
+    embedding = None
     try:
         client = get_client()
         
         if not client:
-            return "❌ API key not configured. Set GEMINI_API_KEY environment variable."
+            return NO_API_KEY_MESSAGE
         
-        prompt = f"""You are a terminal command expert. The user wants to: {query}
+        if CACHE_ENABLED and semantic_kind:
+            embedding = _embed(semantic_text)
+            if embedding:
+                cached = get_semantic_cache().lookup(semantic_kind, embedding)
+                if cached is not None:
+                    get_cache().set(cache_key, cached)
+                    return cached
+        
+        response = client.generate_content(
+            prompt, generation_config=_generation_config(max_output_tokens)
+        )
+        text = response.text
+    except Exception as e:
+        return _handle_api_error(e, prompt)
+    
+    if CACHE_ENABLED:
+        get_cache().set(cache_key, text)
+        if embedding:
+            get_semantic_cache().add(semantic_kind, embedding, text)
+    return text
 
-Respond with ONLY the command they should run, followed by a brief explanation.
 
-Format:
-COMMAND: <the actual command>
-EXPLANATION: <brief 1-line explanation>
+def _gemini_call(semantic_kind: Optional[str] = None, strip: bool = False,
+                 max_output_tokens: Optional[int] = None):
+    """Decorator turning a prompt builder into a cached Gemini call
+    
+    The wrapped function only builds the prompt; client acquisition, caching
+    and error handling happen in _call_gemini. With semantic_kind set, the
+    first argument is also used as the semantic cache query.
+    """
+    def decorator(build_prompt):
+        @functools.wraps(build_prompt)
+        def wrapper(*args, **kwargs):
+            prompt = build_prompt(*args, **kwargs)
+            semantic_text = args[0] if semantic_kind and args else None
+            response = _call_gemini(prompt, semantic_kind, semantic_text, max_output_tokens)
+            return response.strip() if strip else response
+        return wrapper
+    return decorator
 
-Be concise and practical. Assume they're on a Unix-like system (Linux/Mac)."""
-        
-        response = client.generate_content(prompt)
+
+async def _generate_async(client: "genai.GenerativeModel", prompt: str,
+                          config: Optional[dict], limiter=None):
+    """One generate_content_async() call, under the rate limiter when there is one"""
+    if limiter is None:
+        return await client.generate_content_async(prompt, generation_config=config)
+    async with limiter:
+        return await client.generate_content_async(prompt, generation_config=config)
+
+
+async def _fallback_async(prompt: str, limiter=None) -> Optional[str]:
+    """Async counterpart of _handle_api_error's 404 retry (None if it fails too)"""
+    try:
+        client = _build_client(get_api_key(), FALLBACK_MODEL_NAME)
+        response = await _generate_async(client, prompt, None, limiter)
         return response.text
-    
-    except Exception as e:
-        error_str = str(e).lower()
-        if "404" in error_str or "not found" in error_str:
-            # Try alternative model names
-            try:
-                genai.configure(api_key=get_api_key())
-                alternative_client = genai.GenerativeModel('models/gemini-pro')
-                response = alternative_client.generate_content(prompt)
-                return response.text
-            except:
-                return f"❌ API error: Unable to access Gemini models. Error: {str(e)}\n\nTry: pip install --upgrade google-generativeai"
-        elif "quota" in error_str or "limit" in error_str:
-            return "⏱️ Rate limit reached. Wait a moment and try again."
-        elif "api_key" in error_str or "authentication" in error_str:
-            return "🔑 Invalid API key. Run: devkit config --api-key <key>"
-        elif "quota" in error_str:
-            return "💳 API quota exceeded. Check your Google AI Studio account."
-        else:
-            return f"❌ API error: {str(e)}"
+    except Exception:
+        return None
 
 
-def explain_command(command: str) -> str:
-    """Explain what a command does"""
+async def _call_gemini_async(prompt: str, semaphore: "asyncio.Semaphore",
+                             limiter=None, max_output_tokens: Optional[int] = None) -> str:
+    """Async variant of _call_gemini used by the batch helpers"""
+    cache_key = LLMCache.cache_key(MODEL_NAME, prompt)
+    
+    if CACHE_ENABLED:
+        cached = get_cache().get(cache_key)
+        if cached is not None:
+            return cached
+    
     try:
         client = get_client()
         
         if not client:
-            return "❌ API key not configured. Set GEMINI_API_KEY environment variable."
+            return NO_API_KEY_MESSAGE
         
-        prompt = f"""Explain this terminal command in simple terms:
+        config = _generation_config(max_output_tokens)
+        async with semaphore:
+            try:
+                response = await _generate_async(client, prompt, config, limiter)
+            except Exception as e:
+                # Retry a 404 on the fallback model while still holding the slot
+                if _classify_error(e) == 'not_found':
+                    fallback = await _fallback_async(prompt, limiter)
+                    if fallback is not None:
+                        return fallback
+                raise
+        text = response.text
+    except Exception as e:
+        return _api_error_message(e)
+    
+    if CACHE_ENABLED:
+        get_cache().set(cache_key, text)
+    return text
 
-{command}
+
+async def call_gemini_batch(prompts: List[str],
+                            max_output_tokens: Optional[int] = None) -> List[str]:
+    """Send several prompts concurrently, returning responses in order"""
+    import asyncio
+    
+    # Optional requests-per-minute limiter on top of the concurrency cap
+    try:
+        from aiolimiter import AsyncLimiter
+        limiter = AsyncLimiter(REQUESTS_PER_MINUTE, 60)
+    except ImportError:
+        limiter = None
+    
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    
+    return await asyncio.gather(
+        *(_call_gemini_async(prompt, semaphore, limiter, max_output_tokens) for prompt in prompts)
+    )
+
+
+def _estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token)"""
+    return len(text) // 4
+
+
+def fit_to_budget(text: str, max_tokens: int) -> str:
+    """Clamp text to roughly max_tokens, keeping its start and end
+    
+    Two thirds of the budget go to the head and the rest to the tail, so
+    e.g. a long command keeps both its program name and its final arguments.
+    Text that already fits is returned as-is.
+    """
+    if _estimate_tokens(text) <= max_tokens:
+        return text
+    
+    max_chars = max_tokens * 4
+    head = max_chars * 2 // 3
+    tail = max_chars - head
+    return f"{text[:head]}\n... (truncated) ...\n{text[-tail:] if tail else ''}"
+
+
+@_gemini_call(semantic_kind='ask')
+def ask_command(query: str) -> str:
+    """Ask AI to suggest a command for a query"""
+    return f"""You are a terminal command expert. The user wants to: {fit_to_budget(query, QUERY_TOKEN_BUDGET)}
+
+Respond with ONLY the command they should run, followed by a brief explanation.
+
+Format:
+COMMAND: <the actual command>
+EXPLANATION: <brief 1-line explanation>
+
+Be concise and practical. Assume they're on a Unix-like system (Linux/Mac)."""
+
+
+def _explain_prompt(command: str) -> str:
+    """Build the prompt explaining a command"""
+    return f"""Explain this terminal command in simple terms:
+
+{fit_to_budget(command, COMMAND_TOKEN_BUDGET)}
 
 Break it down part by part and explain what each part does. Be concise but clear.
 If there are any potential risks or important notes, mention them."""
+
+
+@_gemini_call(semantic_kind='explain')
+def explain_command(command: str) -> str:
+    """Explain what a command does"""
+    return _explain_prompt(command)
+
+
+def warm_explain_cache(commands: List[str]) -> int:
+    """Pre-fill the cache with explanations for commands not cached yet
+    
+    Returns how many commands now have a cached explanation.
+    """
+    import asyncio
+    
+    cache = get_cache()
+    prompts = []
+    for command in dict.fromkeys(c.strip() for c in commands if c and c.strip()):
+        prompt = _explain_prompt(command)
+        if not cache.has(LLMCache.cache_key(MODEL_NAME, prompt)):
+            prompts.append(prompt)
+    
+    if not prompts:
+        return 0
+    
+    asyncio.run(call_gemini_batch(prompts))
+    return sum(1 for p in prompts if cache.has(LLMCache.cache_key(MODEL_NAME, p)))
+
+
+def _trim_diff(diff: str, max_tokens: int = COMMIT_DIFF_TOKEN_BUDGET) -> str:
+    """Keep headers and changed lines of a diff, stopping at the token budget"""
+    kept = []
+    used = 0
+    
+    for line in diff.split('\n'):
+        if not line.startswith(_DIFF_KEEP_PREFIXES):
+            continue
         
-        response = client.generate_content(prompt)
-        return response.text
+        cost = _estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            kept.append("... (diff truncated) ...")
+            break
+        
+        kept.append(line)
+        used += cost
     
-    except Exception as e:
-        error_str = str(e).lower()
-        if "404" in error_str or "not found" in error_str:
-            return f"❌ API error: Unable to access Gemini models. Try: pip install --upgrade google-generativeai"
-        elif "quota" in error_str or "limit" in error_str:
-            return "⏱️ Rate limit reached. Wait a moment and try again."
-        elif "api_key" in error_str or "authentication" in error_str:
-            return "🔑 Invalid API key. Run: devkit config --api-key <key>"
-        else:
-            return f"❌ API error: {str(e)}"
+    return '\n'.join(kept)
 
 
+@_gemini_call(strip=True, max_output_tokens=COMMIT_MAX_OUTPUT_TOKENS)
 def generate_commit_message(diff: str) -> str:
     """Generate a commit message from git diff"""
-    try:
-        client = get_client()
-        
-        if not client:
-            return "❌ API key not configured. Set GEMINI_API_KEY environment variable."
-        
-        prompt = f"""You are a git commit message expert. Analyze this git diff and generate a conventional commit message.
+    return f"""You are a git commit message expert. Analyze this git diff and generate a conventional commit message.
 
 Git diff:
-{diff[:3000]}  
+{_trim_diff(diff)}
 
 Generate a commit message in this format:
 <type>(<scope>): <description>
@@ -120,37 +413,17 @@ Types: feat, fix, docs, style, refactor, test, chore
 Keep the description concise (under 50 chars).
 
 Respond with ONLY the commit message, nothing else."""
-        
-        response = client.generate_content(prompt)
-        return response.text.strip()
-    
-    except Exception as e:
-        error_str = str(e).lower()
-        if "404" in error_str or "not found" in error_str:
-            return f"❌ API error: Unable to access Gemini models. Try: pip install --upgrade google-generativeai"
-        elif "quota" in error_str or "limit" in error_str:
-            return "⏱️ Rate limit reached. Wait a moment and try again."
-        elif "api_key" in error_str or "authentication" in error_str:
-            return "🔑 Invalid API key. Run: devkit config --api-key <key>"
-        else:
-            return f"❌ API error: {str(e)}"
 
 
-def analyze_history(history: list) -> str:
-    """Analyze command history to find issues (time-travel debugging)"""
-    try:
-        client = get_client()
-        
-        if not client:
-            return "❌ API key not configured. Set GEMINI_API_KEY environment variable."
-        
-        # Format history for AI
-        formatted_history = "\n".join([
-            f"{i+1}. {entry['command']} (exit code: {entry['exit_code']})"
-            for i, entry in enumerate(history[-10:])  # Last 10 commands
-        ])
-        
-        prompt = f"""You are debugging a terminal session. Here are the last commands run:
+def _history_prompt(history: list) -> str:
+    """Build the time-travel analysis prompt for a history window"""
+    # Format history for AI
+    formatted_history = "\n".join(
+        f"{i+1}. {fit_to_budget(entry['command'], HISTORY_COMMAND_TOKEN_BUDGET)} (exit code: {entry['exit_code']})"
+        for i, entry in enumerate(history[-10:])  # Last 10 commands
+    )
+    
+    return f"""You are debugging a terminal session. Here are the last commands run:
 
 {formatted_history}
 
@@ -161,36 +434,28 @@ Analyze this sequence and:
 4. Point out if earlier commands caused the issue
 
 Be concise and actionable."""
-        
-        response = client.generate_content(prompt)
-        return response.text
-    
-    except Exception as e:
-        error_str = str(e).lower()
-        if "404" in error_str or "not found" in error_str:
-            return f"❌ API error: Unable to access Gemini models. Try: pip install --upgrade google-generativeai"
-        elif "quota" in error_str or "limit" in error_str:
-            return "⏱️ Rate limit reached. Wait a moment and try again."
-        elif "api_key" in error_str or "authentication" in error_str:
-            return "🔑 Invalid API key. Run: devkit config --api-key <key>"
-        else:
-            return f"❌ API error: {str(e)}"
 
 
-def suggest_rollback(dangerous_commands: list) -> str:
-    """Suggest rollback commands for dangerous operations"""
-    try:
-        client = get_client()
-        
-        if not client:
-            return "❌ API key not configured. Set GEMINI_API_KEY environment variable."
-        
-        formatted_commands = "\n".join([
-            f"- {cmd['command']} ({cmd['timestamp']})"
-            for cmd in dangerous_commands
-        ])
-        
-        prompt = f"""These potentially dangerous commands were just run:
+@_gemini_call()
+def analyze_history(history: list) -> str:
+    """Analyze command history to find issues (time-travel debugging)"""
+    return _history_prompt(history)
+
+
+def analyze_history_batch(histories: List[list]) -> List[str]:
+    """Analyze several history windows concurrently"""
+    import asyncio
+    return asyncio.run(call_gemini_batch([_history_prompt(h) for h in histories]))
+
+
+def _rollback_prompt(dangerous_commands: list) -> str:
+    """Build the rollback suggestion prompt for a set of commands"""
+    formatted_commands = "\n".join(
+        f"- {fit_to_budget(cmd['command'], HISTORY_COMMAND_TOKEN_BUDGET)} ({cmd['timestamp']})"
+        for cmd in dangerous_commands
+    )
+    
+    return f"""These potentially dangerous commands were just run:
 
 {formatted_commands}
 
@@ -204,17 +469,18 @@ ROLLBACK STEPS:
 etc.
 
 Be practical and safe. If rollback is risky, warn about it."""
-        
-        response = client.generate_content(prompt)
-        return response.text
-    
-    except Exception as e:
-        error_str = str(e).lower()
-        if "404" in error_str or "not found" in error_str:
-            return f"❌ API error: Unable to access Gemini models. Try: pip install --upgrade google-generativeai"
-        elif "quota" in error_str or "limit" in error_str:
-            return "⏱️ Rate limit reached. Wait a moment and try again."
-        elif "api_key" in error_str or "authentication" in error_str:
-            return "🔑 Invalid API key. Run: devkit config --api-key <key>"
-        else:
-            return f"❌ API error: {str(e)}"
\ No newline at end of file
+
+
+@_gemini_call(max_output_tokens=ROLLBACK_MAX_OUTPUT_TOKENS)
+def suggest_rollback(dangerous_commands: list) -> str:
+    """Suggest rollback commands for dangerous operations"""
+    return _rollback_prompt(dangerous_commands)
+
+
+def suggest_rollback_batch(command_groups: List[list]) -> List[str]:
+    """Suggest rollbacks for several groups of commands concurrently"""
+    import asyncio
+    return asyncio.run(call_gemini_batch(
+        [_rollback_prompt(g) for g in command_groups],
+        max_output_tokens=ROLLBACK_MAX_OUTPUT_TOKENS
+    ))
@@ -0,0 +1,270 @@
+"""
+Response cache module for DevKit
+Stores Gemini responses on disk so repeated prompts skip the API round-trip
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import time
+from array import array
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Sequence
+
+from . import storage
+
+if TYPE_CHECKING:
+    import sqlite3
+
+
+# Cached responses expire after a week and the table is capped at this many rows
+DEFAULT_TTL = 7 * 24 * 60 * 60
+MAX_ENTRIES = 500
+
+# `devkit cache warm` runs at most this often unless forced
+WARM_INTERVAL = 7 * 24 * 60 * 60
+
+# Minimum cosine similarity for a paraphrased query to reuse a cached answer
+SIMILARITY_THRESHOLD = 0.92
+
+
+def get_cache_file() -> Path:
+    """Path of the SQLite cache database (resolved at call time)"""
+    return storage.DEVKIT_DIR / "cache" / "responses.db"
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    """Open the cache database and make sure both tables exist"""
+    # sqlite3 loads a shared library, so commands that never touch the cache skip it
+    import sqlite3
+    
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS responses ("
+        "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+        "created_at INTEGER NOT NULL, last_used INTEGER NOT NULL, "
+        "hits INTEGER NOT NULL DEFAULT 0)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS semantic ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, "
+        "embedding BLOB NOT NULL, response TEXT NOT NULL, "
+        "created_at INTEGER NOT NULL)"
+    )
+    return conn
+
+
+def _normalize(vector: Sequence[float]) -> array:
+    """L2-normalize an embedding so a dot product is the cosine similarity"""
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return array('f', (x / norm for x in vector))
+
+
+class LLMCache:
+    """Exact-match cache keyed by sha256(model + prompt) with TTL + LRU eviction"""
+
+    def __init__(self, path: Optional[Path] = None, ttl: int = DEFAULT_TTL,
+                 max_entries: int = MAX_ENTRIES):
+        self.path = Path(path) if path else get_cache_file()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._conn = None
+
+    @staticmethod
+    def cache_key(model: str, prompt: str) -> str:
+        """Build the cache key for a model/prompt pair"""
+        return hashlib.sha256(f"{model}|{prompt}".encode("utf-8")).hexdigest()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Open the database on first use"""
+        if self._conn is None:
+            self._conn = _connect(self.path)
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached response, or None on a miss / expired entry"""
+        now = int(time.time())
+        row = self.conn.execute(
+            "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        response, created_at = row
+        with self.conn:
+            if created_at + self.ttl < now:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+
+            self.conn.execute(
+                "UPDATE responses SET hits = hits + 1, last_used = ? WHERE key = ?",
+                (now, key),
+            )
+        return response
+
+    def has(self, key: str) -> bool:
+        """Check for a live entry without counting it as a hit"""
+        row = self.conn.execute(
+            "SELECT 1 FROM responses WHERE key = ? AND created_at >= ?",
+            (key, int(time.time()) - self.ttl),
+        ).fetchone()
+        return row is not None
+
+    def set(self, key: str, response: str) -> None:
+        """Store a response and evict expired / least recently used entries"""
+        now = int(time.time())
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, last_used, hits) "
+                "VALUES (?, ?, ?, ?, 0)",
+                (key, response, now, now),
+            )
+            # Writes already paid for an API call, so sweeping here is free by comparison
+            self.conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+            self.conn.execute(
+                "DELETE FROM responses WHERE key NOT IN "
+                "(SELECT key FROM responses ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> int:
+        """Remove every cached response, returning how many were dropped
+        
+        Semantic entries are dropped too, but not counted: each one is a copy
+        of a response that is already counted.
+        """
+        with self.conn:
+            removed = self.conn.execute("DELETE FROM responses").rowcount
+            self.conn.execute("DELETE FROM semantic")
+        return removed
+
+    def close(self) -> None:
+        """Close the underlying connection"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class SemanticCache:
+    """Similarity cache that answers paraphrased queries from earlier responses
+
+    Embeddings are stored L2-normalized, so lookup is a dot product against
+    every entry of the same kind; the table is small enough (MAX_ENTRIES) that
+    a linear scan costs far less than the generative call it replaces.
+    """
+
+    def __init__(self, path: Optional[Path] = None, threshold: float = SIMILARITY_THRESHOLD,
+                 ttl: int = DEFAULT_TTL, max_entries: int = MAX_ENTRIES):
+        self.path = Path(path) if path else get_cache_file()
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._conn = None
+        self._entries = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Open the database on first use"""
+        if self._conn is None:
+            self._conn = _connect(self.path)
+        return self._conn
+
+    def _load(self) -> List[tuple]:
+        """Load (kind, embedding, response) rows that have not expired"""
+        if self._entries is None:
+            cutoff = int(time.time()) - self.ttl
+            rows = self.conn.execute(
+                "SELECT kind, embedding, response FROM semantic WHERE created_at >= ?",
+                (cutoff,),
+            ).fetchall()
+            self._entries = []
+            for kind, blob, response in rows:
+                embedding = array('f')
+                embedding.frombytes(blob)
+                self._entries.append((kind, embedding, response))
+        return self._entries
+
+    def lookup(self, kind: str, embedding: Sequence[float]) -> Optional[str]:
+        """Return the best cached response at or above the similarity threshold"""
+        query = _normalize(embedding)
+        best_score, best_response = self.threshold, None
+
+        for entry_kind, vector, response in self._load():
+            if entry_kind != kind or len(vector) != len(query):
+                continue
+            score = sum(a * b for a, b in zip(vector, query))
+            if score >= best_score:
+                best_score, best_response = score, response
+
+        return best_response
+
+    def add(self, kind: str, embedding: Sequence[float], response: str) -> None:
+        """Store a response under its query embedding"""
+        vector = _normalize(embedding)
+        now = int(time.time())
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO semantic (kind, embedding, response, created_at) VALUES (?, ?, ?, ?)",
+                (kind, vector.tobytes(), response, now),
+            )
+            self.conn.execute("DELETE FROM semantic WHERE created_at < ?", (now - self.ttl,))
+            self.conn.execute(
+                "DELETE FROM semantic WHERE id NOT IN "
+                "(SELECT id FROM semantic ORDER BY id DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+        self._entries = None
+
+    def close(self) -> None:
+        """Close the underlying connection"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+_cache: Optional[LLMCache] = None
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_cache() -> LLMCache:
+    """Shared cache instance for the current process"""
+    global _cache
+    if _cache is None or _cache.path != get_cache_file():
+        _cache = LLMCache()
+    return _cache
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Shared semantic cache instance for the current process"""
+    global _semantic_cache
+    if _semantic_cache is None or _semantic_cache.path != get_cache_file():
+        _semantic_cache = SemanticCache()
+    return _semantic_cache
+
+
+def _warm_stamp_file() -> Path:
+    """Timestamp file recording the last cache warm-up"""
+    return storage.DEVKIT_DIR / "cache" / "last_warm"
+
+
+def warm_due() -> bool:
+    """True if the cache has not been warmed within WARM_INTERVAL"""
+    stamp = _warm_stamp_file()
+    if not stamp.exists():
+        return True
+    return time.time() - stamp.stat().st_mtime >= WARM_INTERVAL
+
+
+def mark_warmed() -> None:
+    """Record that the cache was just warmed"""
+    stamp = _warm_stamp_file()
+    stamp.parent.mkdir(parents=True, exist_ok=True)
+    stamp.touch()
@@ -3,17 +3,48 @@ Log analysis module for DevKit
 AI-powered debugging and error analysis
 """
 
+import mmap
+import os
+import re
 import sys
+from array import array
+from collections import deque
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterable, List, Optional, Set
 import click
 
 try:
     from . import ai
-    AI_AVAILABLE = True
+    AI_AVAILABLE = ai.AI_AVAILABLE
 except ImportError:
     AI_AVAILABLE = False
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Rules framing the analysis report
+RULE = "=" * 70
+THIN_RULE = "-" * 70
+
+# Truncation keeps this many leading lines plus this much context around each error
+HEAD_LINES = 20
+CONTEXT_LINES = 5
+
+# Logs at least this large are scanned for patterns across several processes
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+COUNT_BLOCK_BYTES = 1024 * 1024
+
+# Compiled once: a cheap prefilter for any interesting line, then per-category checks
+_KEYWORD_RE = re.compile(r'exception|error|warn', re.IGNORECASE)
+_EXCEPTION_RE = re.compile(r'exception|error:', re.IGNORECASE)
+_ERROR_RE = re.compile(r'error', re.IGNORECASE)
+_WARNING_RE = re.compile(r'warn', re.IGNORECASE)
+_FLAGGED_RE = re.compile(r'exception|error', re.IGNORECASE)
+_KEYWORD_BYTES_RE = re.compile(rb'exception|error|warn', re.IGNORECASE)
+_NEWLINE_RE = re.compile('\n')
+
 
 def read_log_file(filepath: str) -> str:
     """Read log file content"""
@@ -24,6 +55,52 @@ def read_log_file(filepath: str) -> str:
         raise RuntimeError(f"Failed to read log file: {e}")
 
 
+def read_log_excerpt(filepath: str, max_lines: int = 500) -> tuple[str, bool]:
+    """Stream a log file, returning exactly what truncate_log returns for its text
+    
+    Memory stays O(max_lines) regardless of file size: a first pass counts the
+    lines and remembers the latest flagged ones (truncate_log picks error
+    windows from the end), and a second pass reads only the lines kept.
+    """
+    recent = deque(maxlen=max_lines)
+    flagged = deque(maxlen=max_lines)
+    line_count = 0
+    # truncate_log counts the (empty) text after a final newline as a line
+    ends_with_newline = True
+    
+    try:
+        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+            for index, line in enumerate(f):
+                ends_with_newline = line.endswith('\n')
+                line = line.rstrip('\n')
+                line_count += 1
+                
+                if _FLAGGED_RE.search(line):
+                    flagged.append(index)
+                recent.append(line)
+        
+        if ends_with_newline:
+            recent.append('')
+            line_count += 1
+        
+        if line_count <= max_lines:
+            return '\n'.join(recent), False
+        
+        # Each kept window holds its flagged line, so at most max_lines flagged
+        # lines can be kept and the bounded deque loses none that matter
+        keep = _select_lines(line_count, reversed(flagged), max_lines)
+        
+        lines = {}
+        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+            for index, line in enumerate(f):
+                if index in keep:
+                    lines[index] = line.rstrip('\n')
+    except Exception as e:
+        raise RuntimeError(f"Failed to read log file: {e}")
+    
+    return _render_excerpt(keep, line_count, lambda index: lines.get(index, '')), True
+
+
 def read_stdin() -> str:
     """Read log content from stdin"""
     if sys.stdin.isatty():
@@ -33,28 +110,91 @@ def read_stdin() -> str:
 
 
 def truncate_log(log_content: str, max_lines: int = 500) -> tuple[str, bool]:
-    """Truncate log to reasonable size for AI analysis"""
-    lines = log_content.split('\n')
+    """Truncate log to reasonable size for AI analysis
+    
+    Lines around detected errors/exceptions are kept first (most recent
+    first), then the rest of the budget goes to the tail of the log.
+    """
+    line_count = log_content.count('\n') + 1
     
-    if len(lines) <= max_lines:
+    if line_count <= max_lines:
         return log_content, False
     
-    # Keep first 100 and last 400 lines (where errors usually are)
-    truncated = '\n'.join(lines[:100] + ['... (truncated) ...'] + lines[-400:])
-    return truncated, True
+    # Start offset of every line; only the kept lines are ever sliced out
+    starts = array('q', [0])
+    starts.extend(match.end() for match in _NEWLINE_RE.finditer(log_content))
+    
+    def line_at(index: int) -> str:
+        end = starts[index + 1] - 1 if index + 1 < line_count else len(log_content)
+        return log_content[starts[index]:end]
+    
+    patterns = extract_error_patterns(log_content)
+    flagged = sorted(
+        {line_num - 1 for line_num, _ in patterns['exceptions'] + patterns['errors']},
+        reverse=True
+    )
+    
+    keep = _select_lines(line_count, flagged, max_lines)
+    return _render_excerpt(keep, line_count, line_at), True
 
 
-def analyze_log_with_ai(log_content: str, context: str = "") -> str:
-    """Send log to AI for analysis"""
-    if not AI_AVAILABLE:
-        return "❌ AI features not available. Install google-generativeai."
+def _select_lines(line_count: int, flagged: Iterable[int], max_lines: int) -> Set[int]:
+    """Indices of the lines to keep, given flagged line indices newest first"""
+    # Always keep the start of the log for context (startup banner, config)
+    keep = set(range(HEAD_LINES))
+    
+    for index in flagged:
+        window = range(max(0, index - CONTEXT_LINES), min(line_count, index + CONTEXT_LINES + 1))
+        new_lines = [i for i in window if i not in keep]
+        if len(keep) + len(new_lines) > max_lines:
+            break
+        keep.update(new_lines)
+    
+    # Fill the remaining budget from the end (where errors usually are)
+    index = line_count - 1
+    while len(keep) < max_lines and index >= 0:
+        keep.add(index)
+        index -= 1
+    
+    return keep
+
+
+def _render_excerpt(keep: Set[int], line_count: int, line_at: Callable[[int], str]) -> str:
+    """Join the kept lines, marking each gap with a truncation line"""
+    output = []
+    previous = -1
+    for index in sorted(keep):
+        if index != previous + 1:
+            output.append('... (truncated) ...')
+        output.append(line_at(index))
+        previous = index
+    
+    if previous != line_count - 1:
+        output.append('... (truncated) ...')
+    
+    return '\n'.join(output)
+
+
+def _build_log_prompt(log_content: str, context: str = "",
+                      truncated: Optional[bool] = None) -> str:
+    """Build the AI prompt for a single log
+    
+    Pass truncated when the content is already an excerpt (read_log_excerpt).
+    """
+    if truncated is None:
+        # Truncate if too long
+        truncated_log, was_truncated = truncate_log(log_content)
+    else:
+        truncated_log, was_truncated = log_content, truncated
     
-    # Truncate if too long
-    truncated_log, was_truncated = truncate_log(log_content)
+    # Line-based truncation can still leave a huge prompt when lines are long
+    budgeted_log = ai.fit_to_budget(truncated_log, ai.LOG_TOKEN_BUDGET)
+    if budgeted_log is not truncated_log:
+        truncated_log, was_truncated = budgeted_log, True
     
     truncation_note = "\n(Note: Log was truncated to fit context window)" if was_truncated else ""
     
-    prompt = f"""You are a senior software engineer debugging an application crash.
+    return f"""You are a senior software engineer debugging an application crash.
 
 {context}
 
@@ -73,69 +213,284 @@ Log content:
 {truncation_note}
 
 Format your response clearly with sections. Be specific and actionable."""
+
+
+def analyze_log_with_ai(log_content: str, context: str = "",
+                        truncated: Optional[bool] = None) -> str:
+    """Send log to AI for analysis"""
+    if not AI_AVAILABLE:
+        return "❌ AI features not available. Install google-generativeai."
     
-    try:
-        client = ai.get_client()
-        if not client:
-            return "❌ AI not configured. Set GEMINI_API_KEY."
-        
-        response = client.generate_content(prompt)
-        return response.text
+    prompt = _build_log_prompt(log_content, context, truncated)
     
-    except Exception as e:
-        return f"❌ AI analysis failed: {str(e)}"
+    # Same path as analyze_logs_batch: response cache, error classification
+    # and the fallback model all live in ai._call_gemini
+    return ai._call_gemini(prompt)
 
 
-def extract_error_patterns(log_content: str) -> dict:
-    """Extract common error patterns from log"""
-    patterns = {
-        'exceptions': [],
-        'errors': [],
-        'warnings': [],
-        'stack_traces': []
-    }
-    
-    lines = log_content.split('\n')
-    in_stack_trace = False
-    current_stack = []
-    
-    for i, line in enumerate(lines):
-        line_lower = line.lower()
+async def analyze_logs_batch(log_contents: List[str], context: str = "",
+                             truncated: Optional[List[bool]] = None) -> List[str]:
+    """Analyze several logs concurrently, returning one analysis per log"""
+    if not AI_AVAILABLE:
+        return ["❌ AI features not available. Install google-generativeai."] * len(log_contents)
+    
+    if truncated is None:
+        truncated = [None] * len(log_contents)
+    
+    prompts = [
+        _build_log_prompt(content, context, was_truncated)
+        for content, was_truncated in zip(log_contents, truncated)
+    ]
+    return await ai.call_gemini_batch(prompts)
+
+
+class _PatternScanner:
+    """Incremental error-pattern classifier shared by the string and file scanners"""
+    
+    def __init__(self):
+        self.patterns = {
+            'exceptions': [],
+            'errors': [],
+            'warnings': [],
+            'stack_traces': []
+        }
+        self.in_stack_trace = False
+        self.current_stack = []
+    
+    def feed(self, line_num: int, line: str) -> None:
+        """Classify one line (1-based line number)"""
+        patterns = self.patterns
         
         # Detect exceptions
-        if 'exception' in line_lower or 'error:' in line_lower:
-            patterns['exceptions'].append((i + 1, line.strip()))
-            in_stack_trace = True
-            current_stack = [line.strip()]
+        if _EXCEPTION_RE.search(line):
+            patterns['exceptions'].append((line_num, line.strip()))
+            self.in_stack_trace = True
+            self.current_stack = [line.strip()]
         
         # Detect errors
-        elif 'error' in line_lower and 'exception' not in line_lower:
-            patterns['errors'].append((i + 1, line.strip()))
+        elif _ERROR_RE.search(line):
+            patterns['errors'].append((line_num, line.strip()))
         
         # Detect warnings
-        elif 'warn' in line_lower:
-            patterns['warnings'].append((i + 1, line.strip()))
+        elif _WARNING_RE.search(line):
+            patterns['warnings'].append((line_num, line.strip()))
         
         # Collect stack trace
-        elif in_stack_trace:
-            if line.strip().startswith('at ') or line.strip().startswith('File '):
-                current_stack.append(line.strip())
+        elif self.in_stack_trace:
+            if line.strip().startswith(('at ', 'File ')):
+                self.current_stack.append(line.strip())
             else:
-                if current_stack:
-                    patterns['stack_traces'].append(current_stack)
-                    current_stack = []
-                in_stack_trace = False
+                if self.current_stack:
+                    patterns['stack_traces'].append(self.current_stack)
+                    self.current_stack = []
+                self.in_stack_trace = False
+
+
+def _count_newlines(buffer, start: int, end: int) -> int:
+    """Count newlines in buffer[start:end] for str, bytes or mmap buffers"""
+    if isinstance(buffer, str):
+        return buffer.count('\n', start, end)
+    
+    # mmap has no count(); copy bounded blocks instead of the whole range
+    count = 0
+    for block_start in range(start, end, COUNT_BLOCK_BYTES):
+        count += buffer[block_start:min(end, block_start + COUNT_BLOCK_BYTES)].count(b'\n')
+    return count
+
+
+def _scan_text(scanner: _PatternScanner, log_content, start: int = 0,
+               end: Optional[int] = None) -> int:
+    """Feed the interesting lines of log_content[start:end] to scanner
+    
+    log_content may be a str or a bytes-like buffer such as an mmap. Lines
+    are only materialized (and decoded) around keyword hits and while inside
+    a stack trace; everything else is skipped by a single compiled regex
+    scan. Returns the number of lines in the range.
+    """
+    binary = not isinstance(log_content, str)
+    keyword_re = _KEYWORD_BYTES_RE if binary else _KEYWORD_RE
+    newline = b'\n' if binary else '\n'
+    end_of_log = len(log_content) if end is None else end
+    pos = start
+    line_num = 1
+    
+    while True:
+        if not scanner.in_stack_trace:
+            # Jump straight to the next line containing a keyword
+            match = keyword_re.search(log_content, pos, end_of_log)
+            if not match:
+                break
+            line_start = log_content.rfind(newline, pos, match.start()) + 1 or pos
+            line_num += _count_newlines(log_content, pos, line_start)
+            pos = line_start
+        
+        line_end = log_content.find(newline, pos, end_of_log)
+        if line_end == -1:
+            line_end = end_of_log
+        
+        line = log_content[pos:line_end]
+        scanner.feed(line_num, line.decode('utf-8', errors='ignore') if binary else line)
+        
+        if line_end == end_of_log:
+            break
+        pos = line_end + 1
+        line_num += 1
+    
+    return _count_newlines(log_content, start, end_of_log) + 1
+
+
+def extract_error_patterns(log_content: str) -> dict:
+    """Extract common error patterns from log"""
+    scanner = _PatternScanner()
+    _scan_text(scanner, log_content)
+    return scanner.patterns
+
+
+def extract_error_patterns_from_file(filepath: str) -> dict:
+    """Extract error patterns from a log file without reading it into memory
+    
+    The file is memory-mapped and scanned as bytes; only lines near a keyword
+    hit are decoded.
+    
+    Files of PARALLEL_MIN_BYTES or more are split across worker processes.
+    """
+    try:
+        if (os.cpu_count() or 1) > 1 and os.path.getsize(filepath) >= PARALLEL_MIN_BYTES:
+            return extract_error_patterns_parallel(filepath)
+    except OSError:
+        pass  # Let the streaming path report the error
+    
+    scanner = _PatternScanner()
+    
+    try:
+        with open(filepath, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return scanner.patterns
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                _scan_text(scanner, mm)
+    except Exception as e:
+        raise RuntimeError(f"Failed to read log file: {e}")
+    
+    return scanner.patterns
+
+
+def _scan_chunk(filepath: str, start: int, end: int, is_last: bool) -> tuple:
+    """Worker: scan bytes [start, end) of a log file as if it began a fresh log
+    
+    Returns (patterns, line_count, lead, lead_end, end_state). lead holds the
+    stack frames at the top of the chunk and lead_end how that run ended
+    ('exception', 'plain' or None), so the parent can finish a stack trace
+    that started in the previous chunk.
+    """
+    with open(filepath, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Inner chunks end on a newline that belongs to them, not to an empty next line
+            if not is_last and end > start and mm[end - 1] == 0x0A:
+                end -= 1
+            
+            scanner = _PatternScanner()
+            line_count = _scan_text(scanner, mm, start, end)
+            
+            lead, lead_end = [], None
+            pos = start
+            while True:
+                line_end = mm.find(b'\n', pos, end)
+                if line_end == -1:
+                    line_end = end
+                line = mm[pos:line_end].decode('utf-8', errors='ignore')
+                
+                # Same precedence as _PatternScanner.feed: an error or warning
+                # line is counted as such (not as a frame) and keeps the trace open
+                if _EXCEPTION_RE.search(line):
+                    lead_end = 'exception'
+                    break
+                elif _ERROR_RE.search(line) or _WARNING_RE.search(line):
+                    pass
+                elif line.strip().startswith(('at ', 'File ')):
+                    lead.append(line.strip())
+                else:
+                    lead_end = 'plain'
+                    break
+                
+                if line_end == end:
+                    break
+                pos = line_end + 1
+    
+    end_state = (scanner.in_stack_trace, scanner.current_stack)
+    return scanner.patterns, line_count, lead, lead_end, end_state
+
+
+def _chunk_bounds(filepath: str, chunks: int) -> List[tuple]:
+    """Split a file into up to `chunks` byte ranges that end on line boundaries"""
+    with open(filepath, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            bounds = []
+            start = 0
+            for i in range(1, chunks):
+                newline = mm.find(b'\n', max(start, size * i // chunks))
+                if newline == -1:
+                    break
+                bounds.append((start, newline + 1))
+                start = newline + 1
+            bounds.append((start, size))
+    return bounds
+
+
+def extract_error_patterns_parallel(filepath: str, workers: Optional[int] = None) -> dict:
+    """Extract error patterns from a large log using one process per chunk
+    
+    Produces the same result as extract_error_patterns on the whole file.
+    """
+    # Only needed for huge logs, and the multiprocessing machinery is slow to import
+    from concurrent.futures import ProcessPoolExecutor
     
-    return patterns
+    workers = workers or os.cpu_count() or 1
+    
+    try:
+        if os.path.getsize(filepath) == 0:
+            return _PatternScanner().patterns
+        bounds = _chunk_bounds(filepath, workers)
+        
+        with ProcessPoolExecutor(max_workers=len(bounds)) as pool:
+            futures = [
+                pool.submit(_scan_chunk, filepath, start, end, i == len(bounds) - 1)
+                for i, (start, end) in enumerate(bounds)
+            ]
+            results = [future.result() for future in futures]
+    except Exception as e:
+        raise RuntimeError(f"Failed to read log file: {e}")
+    
+    merged = _PatternScanner().patterns
+    base = 0
+    in_stack_trace, current_stack = False, []
+    
+    for patterns, line_count, lead, lead_end, end_state in results:
+        if in_stack_trace:
+            # Finish the trace carried over from the previous chunk
+            current_stack = current_stack + lead
+            if lead_end == 'plain' and current_stack:
+                merged['stack_traces'].append(current_stack)
+            if lead_end is not None:
+                in_stack_trace, current_stack = end_state
+        else:
+            in_stack_trace, current_stack = end_state
+        
+        for key in ('exceptions', 'errors', 'warnings'):
+            merged[key].extend((line_num + base, line) for line_num, line in patterns[key])
+        merged['stack_traces'].extend(patterns['stack_traces'])
+        base += line_count
+    
+    return merged
 
 
 def format_analysis_output(analysis: str, patterns: dict) -> str:
     """Format the complete analysis output"""
     output = []
     
-    output.append("\n" + "=" * 70)
+    output.append("\n" + RULE)
     output.append("🔍 LOG ANALYSIS RESULTS")
-    output.append("=" * 70 + "\n")
+    output.append(RULE + "\n")
     
     # Quick stats
     output.append("📊 Quick Stats:")
@@ -153,8 +508,22 @@ def format_analysis_output(analysis: str, patterns: dict) -> str:
     
     # AI Analysis
     output.append("🤖 AI Analysis:")
-    output.append("-" * 70)
+    output.append(THIN_RULE)
     output.append(analysis)
-    output.append("-" * 70 + "\n")
+    output.append(THIN_RULE + "\n")
+    
+    return '\n'.join(output)
+
+
+def format_analysis_json(results: List[dict]) -> str:
+    """Serialize analysis results for machine consumption
+
+    Each result holds the source, the extracted patterns and the AI analysis;
+    a single result is emitted as an object, several as a list.
+    """
+    data = results[0] if len(results) == 1 else results
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode('utf-8')
     
-    return '\n'.join(output)
\ No newline at end of file
+    import json
+    return json.dumps(data, indent=2, ensure_ascii=False)
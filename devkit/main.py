@@ -4,23 +4,29 @@ Main CLI entry point with all commands
 """
 
 import click
-import subprocess
+import os
+import re
 import sys
 from pathlib import Path
 from datetime import datetime
 
 # Import colorama for colored output
 try:
-    from colorama import Fore, Style, init
-    init(autoreset=True)
+    from colorama import Fore as _ColorFore, Style as _ColorStyle, init
     COLORS_AVAILABLE = True
 except ImportError:
-    # Fallback if colorama is not available
+    COLORS_AVAILABLE = False
+
+if COLORS_AVAILABLE and sys.stdout.isatty():
+    init(autoreset=True)
+    Fore, Style = _ColorFore, _ColorStyle
+else:
+    # Fallback if colorama is not available, or plain text when output is
+    # redirected (which also skips colorama's per-write stdout wrapper)
     class Fore:
         GREEN = RED = YELLOW = BLUE = CYAN = MAGENTA = WHITE = ""
     class Style:
         RESET_ALL = BRIGHT = DIM = ""
-    COLORS_AVAILABLE = False
 
 # Import our modules
 from . import storage
@@ -31,17 +37,51 @@ from . import rollback
 
 from . import workspace
 from . import logs as log_analyzer
+from . import ai_cache
 
 try:
     from . import ai
-    AI_AVAILABLE = True
+    AI_AVAILABLE = ai.AI_AVAILABLE
 except ImportError:
     AI_AVAILABLE = False
 
+# Status prefixes, composed once instead of in every message
+SUCCESS = f"{Fore.GREEN}✅ "
+FAILURE = f"{Fore.RED}❌ "
+
+# Horizontal rules framing command output
+RULE = "=" * 70
+SHORT_RULE = "=" * 50
+
+# Buffer size for snippet import/export files
+FILE_BUFFER_SIZE = 1 << 20
+
+# Characters that need a real shell (pipes, redirection, expansion, quoting
+# escapes, variable assignment, comments); snippets without them run directly
+_SHELL_METACHARACTERS = frozenset('|&;<>()$`\\*?[]{}~#=!%\n')
+
+# Date and time (to the second) at the start of an isoformat() timestamp
+_ISO_TIMESTAMP_RE = re.compile(r'(\d{4}-\d{2}-\d{2})T(\d{2}:\d{2}:\d{2})')
+
+# Conventional commit types offered by the interactive `commit` helper
+_COMMIT_TYPES = {
+    '1': ('feat', '✨ New feature'),
+    '2': ('fix', '🐛 Bug fix'),
+    '3': ('docs', '📝 Documentation'),
+    '4': ('style', '💄 Code style'),
+    '5': ('refactor', '♻️  Refactoring'),
+    '6': ('test', '✅ Tests'),
+    '7': ('chore', '🔧 Maintenance')
+}
+_COMMIT_TYPE_MENU = "Select type:\n" + "\n".join(
+    f"  {key}. {value:10} - {desc}" for key, (value, desc) in _COMMIT_TYPES.items()
+)
+
 # Main CLI Group
 @click.group()
 @click.version_option(version="0.1.0")
-def cli():
+@click.option('--no-cache', is_flag=True, help='Bypass the AI response cache')
+def cli(no_cache):
     """DevKit - AI-powered terminal assistant for developers
     
     Your companion for terminal operations:
@@ -53,7 +93,8 @@ def cli():
     
     Get started: devkit --help
     """
-    pass
+    if no_cache and AI_AVAILABLE:
+        ai.CACHE_ENABLED = False
 
 # ============================================================================
 # Snippet Commands
@@ -72,12 +113,17 @@ def snippet():
 @click.argument('name')
 @click.argument('command')
 @click.option('--tags', help='Comma-separated tags for the snippet')
-def snippet_save(name: str, command: str, tags: str):
-    """Save a new snippet with optional tags"""
+@click.option('--yes', '-y', is_flag=True, help='Overwrite an existing snippet without asking')
+def snippet_save(name: str, command: str, tags: str, yes: bool):
+    """Save a new snippet with optional tags
+    
+    Only an interactive terminal is asked before overwriting; scripts
+    piping into devkit overwrite without a prompt.
+    """
     snippets = storage.load_snippets()
     
     # Check if snippet already exists
-    if name in snippets:
+    if name in snippets and not yes and sys.stdin.isatty():
         if not click.confirm(f"Snippet {name} already exists. Overwrite?"):
             return
     
@@ -95,45 +141,55 @@ def snippet_save(name: str, command: str, tags: str):
     storage.save_snippets(snippets)
     
     tag_info = f" (tags: {', '.join(tag_list)})" if tag_list else ""
-    click.echo(f"{Fore.GREEN}✅ Saved snippet: {name}{tag_info}{Style.RESET_ALL}")
+    click.echo(f"{SUCCESS}Saved snippet: {name}{tag_info}{Style.RESET_ALL}")
+
+def _render_snippet(name: str, command: str, tags: list) -> str:
+    """Colored listing block for one snippet"""
+    block = f"\n{Fore.CYAN}{name}{Style.RESET_ALL}\n  {Fore.WHITE}{command}{Style.RESET_ALL}\n"
+    if tags:
+        block += f"  {Fore.YELLOW}Tags: {', '.join(tags)}{Style.RESET_ALL}\n"
+    return block
+
+def _append_snippet_entries(parts: list, positions=None) -> None:
+    """Append the colored listing of every snippet, or of the given positions, to parts
+    
+    Each block is rendered once per parse of the snippets file, and large
+    stores print thousands of lines, so callers join the parts and write
+    them with a single click.echo().
+    """
+    style = 'color' if Fore.CYAN else 'plain'
+    rendered = storage.load_rendered_snippets(style, _render_snippet)
+    parts.extend(rendered if positions is None else (rendered[i] for i in positions))
+
+def _filter_by_tag(columns: "storage.Snippets", tag_lc: str) -> list:
+    """Column positions of snippets carrying a tag (case-insensitive)"""
+    fields = storage.load_snippet_search_fields()
+    return [i for i, name in enumerate(columns.names) if tag_lc in fields[name]['tags_lc']]
 
 @snippet.command('list')
 @click.option('--tag', help='Filter snippets by tag')
 def snippet_list(tag: str):
     """List all saved snippets, optionally filtered by tag"""
-    snippets = storage.load_snippets()
+    columns = storage.load_snippet_columns()
     
-    if not snippets:
+    if not len(columns):
         click.echo("No snippets saved yet!")
         return
     
-    # Filter by tag if specified
     if tag:
-        filtered_snippets = {}
-        for name, data in snippets.items():
-            if tag.lower() in [t.lower() for t in data.get('tags', [])]:
-                filtered_snippets[name] = data
-        snippets = filtered_snippets
+        positions = _filter_by_tag(columns, tag.lower())
+        count = len(positions)
         
-        if not snippets:
+        if not positions:
             click.echo(f"No snippets found with tag '{tag}'")
             return
+    else:
+        # No filter: every pre-rendered block, in store order
+        positions, count = None, len(columns)
     
-    click.echo(f"\n📋 Saved Snippets ({len(snippets)} total):")
-    click.echo("=" * 70)
-    
-    for name, data in snippets.items():
-        command = data.get('command', '')
-        tags = data.get('tags', [])
-        
-        click.echo(f"\n{Fore.CYAN}{name}{Style.RESET_ALL}")
-        click.echo(f"  {Fore.WHITE}{command}{Style.RESET_ALL}")
-        
-        if tags:
-            tag_str = ', '.join(tags)
-            click.echo(f"  {Fore.YELLOW}Tags: {tag_str}{Style.RESET_ALL}")
-    
-    click.echo()
+    parts = [f"\n📋 Saved Snippets ({count} total):\n", RULE, "\n"]
+    _append_snippet_entries(parts, positions)
+    click.echo(''.join(parts))
 
 @snippet.command('search')
 @click.argument('query')
@@ -146,43 +202,22 @@ def snippet_search(query: str):
         return
     
     # Search in name, command content, and tags
-    results = {}
-    for name, data in snippets.items():
-        command = data.get('command', '')
-        tags = data.get('tags', [])
-        tag_str = ' '.join(tags)
-        
-        if (query.lower() in name.lower() or 
-            query.lower() in command.lower() or
-            query.lower() in tag_str.lower()):
-            results[name] = data
+    results = storage.search_snippets(query)
     
     if not results:
         click.echo(f"{Fore.YELLOW}No snippets found matching '{query}'.{Style.RESET_ALL}")
         return
     
-    click.echo(f"\n🔍 Search results for '{query}' ({len(results)} found):")
-    click.echo("=" * 70)
-    
-    for name, data in results.items():
-        command = data.get('command', '')
-        tags = data.get('tags', [])
-        
-        click.echo(f"\n{Fore.CYAN}{name}{Style.RESET_ALL}")
-        click.echo(f"  {Fore.WHITE}{command}{Style.RESET_ALL}")
-        
-        if tags:
-            tag_str = ', '.join(tags)
-            click.echo(f"  {Fore.YELLOW}Tags: {tag_str}{Style.RESET_ALL}")
-    
-    click.echo("\n" + "=" * 70)
+    parts = [f"\n🔍 Search results for '{query}' ({len(results)} found):\n", RULE, "\n"]
+    _append_snippet_entries(parts, results)
+    parts.append("\n" + RULE)
+    click.echo(''.join(parts))
 
 @snippet.command('export')
 @click.argument('filename')
 @click.option('--format', 'export_format', type=click.Choice(['json', 'txt']), default='json', help='Export format')
 def snippet_export(filename: str, export_format: str):
     """Export snippets to a file"""
-    import json
     snippets = storage.load_snippets()
     
     if not snippets:
@@ -190,87 +225,64 @@ def snippet_export(filename: str, export_format: str):
         return
     
     try:
+        # Large write buffers keep big exports to a handful of syscalls
         if export_format == 'json':
-            with open(filename, 'w') as f:
-                json.dump(snippets, f, indent=2)
+            with open(filename, 'wb', buffering=FILE_BUFFER_SIZE) as f:
+                storage.json_dump_stream(snippets, f)
         else:  # txt format
-            with open(filename, 'w') as f:
-                for name, data in snippets.items():
-                    command = data.get('command', '')
-                    tags = data.get('tags', [])
-                    f.write(f"# {name}\n")
-                    if tags:
-                        f.write(f"# Tags: {', '.join(tags)}\n")
-                    f.write(f"{command}\n\n")
-        
-        click.echo(f"{Fore.GREEN}✅ Exported {len(snippets)} snippets to {filename}{Style.RESET_ALL}")
+            # One encoded write per snippet, straight into the binary buffer
+            with open(filename, 'wb', buffering=FILE_BUFFER_SIZE) as f:
+                for name, command, tags in storage.load_snippet_columns().rows():
+                    tag_line = f"# Tags: {', '.join(tags)}\n" if tags else ""
+                    f.write(f"# {name}\n{tag_line}{command}\n\n".encode('utf-8'))
+        
+        click.echo(f"{SUCCESS}Exported {len(snippets)} snippets to {filename}{Style.RESET_ALL}")
     except Exception as e:
-        click.echo(f"{Fore.RED}❌ Export failed: {str(e)}{Style.RESET_ALL}")
+        click.echo(f"{FAILURE}Export failed: {str(e)}{Style.RESET_ALL}")
 
 @snippet.command('import')
 @click.argument('filename')
 @click.option('--overwrite', is_flag=True, help='Overwrite existing snippets with same names')
 def snippet_import(filename: str, overwrite: bool):
     """Import snippets from a file"""
-    import json
-    import os
-    
     if not os.path.exists(filename):
-        click.echo(f"{Fore.RED}❌ File {filename} not found.{Style.RESET_ALL}")
+        click.echo(f"{FAILURE}File {filename} not found.{Style.RESET_ALL}")
         return
     
     try:
-        with open(filename, 'r') as f:
-            if filename.endswith('.json'):
-                imported_snippets = json.load(f)
-            else:  # txt format
-                imported_snippets = {}
-                content = f.read()
-                # Simple parsing for txt format
-                lines = content.split('\n')
-                current_name = None
-                current_command = []
-                
-                for line in lines:
-                    if line.startswith('# '):
-                        if current_name and current_command:
-                            imported_snippets[current_name] = '\n'.join(current_command)
-                        current_name = line[2:].strip()
-                        current_command = []
-                    elif line.strip() and current_name:
-                        current_command.append(line)
-                
-                if current_name and current_command:
-                    imported_snippets[current_name] = '\n'.join(current_command)
+        if filename.endswith('.json'):
+            imported_snippets = storage.json_load_file(filename)
+        else:  # txt format
+            imported_snippets = storage.load_snippets_txt(filename)
         
         # Load existing snippets
         existing_snippets = storage.load_snippets()
         
-        # Check for conflicts
-        conflicts = []
-        for name in imported_snippets:
-            if name in existing_snippets and not overwrite:
-                conflicts.append(name)
-        
-        if conflicts:
-            click.echo(f"{Fore.YELLOW}⚠️  Found {len(conflicts)} conflicting snippets:{Style.RESET_ALL}")
-            for name in conflicts:
-                click.echo(f"  - {name}")
-            if not click.confirm("Use --overwrite to replace them, or skip?"):
-                return
-        
-        # Import snippets
-        imported_count = 0
-        for name, command in imported_snippets.items():
-            if name not in existing_snippets or overwrite:
-                existing_snippets[name] = command
-                imported_count += 1
-        
-        storage.save_snippets(existing_snippets)
-        click.echo(f"{Fore.GREEN}✅ Imported {imported_count} snippets from {filename}{Style.RESET_ALL}")
+        if overwrite:
+            new_entries = imported_snippets
+        else:
+            # Split conflicts from new snippets in a single pass
+            conflicts = []
+            new_entries = {}
+            for name, command in imported_snippets.items():
+                if name in existing_snippets:
+                    conflicts.append(name)
+                else:
+                    new_entries[name] = command
+            
+            if conflicts:
+                click.echo(f"{Fore.YELLOW}⚠️  Found {len(conflicts)} conflicting snippets:{Style.RESET_ALL}")
+                for name in conflicts:
+                    click.echo(f"  - {name}")
+                if not click.confirm("Use --overwrite to replace them, or skip?"):
+                    return
+        
+        existing_snippets.update(new_entries)
+        storage.save_snippets_durable(existing_snippets)
+        click.echo(f"{SUCCESS}Imported {len(new_entries)} snippets from {filename}{Style.RESET_ALL}")
         
     except Exception as e:
-        click.echo(f"{Fore.RED}❌ Import failed: {str(e)}{Style.RESET_ALL}")
+        click.echo(f"{FAILURE}Import failed: {str(e)}{Style.RESET_ALL}")
 
 @snippet.command('delete')
 @click.argument('name')
@@ -280,16 +292,30 @@ def snippet_delete(name: str):
         snippets = storage.load_snippets()
         
         if name not in snippets:
-            click.echo(f"{Fore.RED}❌ Snippet {name} not found!{Style.RESET_ALL}")
+            click.echo(f"{FAILURE}Snippet {name} not found!{Style.RESET_ALL}")
             return
         
         del snippets[name]
         storage.save_snippets(snippets)
-        click.echo(f"{Fore.GREEN}✅ Deleted snippet: {name}{Style.RESET_ALL}")
+        click.echo(f"{SUCCESS}Deleted snippet: {name}{Style.RESET_ALL}")
     except Exception as e:
         click.echo(f"❌ Error: {str(e)}")
         sys.exit(1)
 
+def _suggest_snippet_names(name: str, snippets: dict) -> list:
+    """Snippet names containing name, or close spellings of it as a fallback
+    
+    Containment comes from the snippet name trie; the difflib fallback only
+    runs when no name contains it.
+    """
+    similar = storage.snippet_names_containing(name)
+    
+    if not similar:
+        import difflib
+        similar = difflib.get_close_matches(name, list(snippets), n=5, cutoff=0.6)
+    
+    return similar
+
 @snippet.command('get')
 @click.argument('name')
 def snippet_get(name: str):
@@ -297,10 +323,10 @@ def snippet_get(name: str):
     snippets = storage.load_snippets()
     
     if name not in snippets:
-        click.echo(f"{Fore.RED}❌ Snippet {name} not found!{Style.RESET_ALL}")
+        click.echo(f"{FAILURE}Snippet {name} not found!{Style.RESET_ALL}")
         
         # Suggest similar names
-        similar = [n for n in snippets.keys() if name.lower() in n.lower()]
+        similar = _suggest_snippet_names(name, snippets)
         if similar:
             click.echo(f"\n{Fore.YELLOW}Did you mean: {', '.join(similar)}{Style.RESET_ALL}")
         
@@ -318,16 +344,24 @@ def snippet_get(name: str):
         tag_str = ', '.join(tags)
         click.echo(f"{Fore.YELLOW}Tags: {tag_str}{Style.RESET_ALL}")
     
-    if created:
-        try:
-            dt = datetime.fromisoformat(created)
-            created_str = dt.strftime("%Y-%m-%d %H:%M:%S")
-            click.echo(f"{Fore.BLUE}Created: {created_str}{Style.RESET_ALL}")
-        except:
-            pass
+    # created is written by isoformat(), so its date and time can be sliced out as-is
+    match = _ISO_TIMESTAMP_RE.match(created)
+    if match:
+        click.echo(f"{Fore.BLUE}Created: {match[1]} {match[2]}{Style.RESET_ALL}")
     
     click.echo()
 
+def _snippet_argv(command: str):
+    """argv for running a snippet without /bin/sh, or None if it needs a shell"""
+    if sys.platform == 'win32' or not _SHELL_METACHARACTERS.isdisjoint(command):
+        return None
+    import shlex
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+    return argv or None
+
 @snippet.command('run')
 @click.argument('name')
 def snippet_run(name: str):
@@ -335,21 +369,42 @@ def snippet_run(name: str):
     snippets = storage.load_snippets()
     
     if name not in snippets:
-        click.echo(f"{Fore.RED}❌ Snippet {name} not found!{Style.RESET_ALL}")
+        click.echo(f"{FAILURE}Snippet {name} not found!{Style.RESET_ALL}")
         return
         
     data = snippets[name]
     command = data.get('command', '')
     click.echo(f"{Fore.BLUE}🚀 Running: {command}{Style.RESET_ALL}")
     
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
-    output = result.stdout + result.stderr # Log to History
-    storage.log_command(command, output, result.returncode)
+    import subprocess
     
-    if result.returncode != 0:
-        click.echo(f"{Fore.RED}❌ Command failed with exit code {result.returncode}{Style.RESET_ALL}")
+    # Stream output as it arrives; history only keeps the start of it anyway
+    popen_kwargs = dict(stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                        text=True, errors='replace', bufsize=1)
+    proc = None
+    argv = _snippet_argv(command)
+    if argv is not None:
+        try:
+            proc = subprocess.Popen(argv, **popen_kwargs)
+        except OSError:
+            # Shell builtins or a missing program: the shell runs or reports those
+            pass
+    if proc is None:
+        proc = subprocess.Popen(command, shell=True, **popen_kwargs)
+    logged, logged_chars = [], 0
+    for line in proc.stdout:
+        click.echo(line, nl=False)
+        if logged_chars < storage.HISTORY_OUTPUT_LIMIT:
+            logged.append(line)
+            logged_chars += len(line)
+    returncode = proc.wait()
+    
+    storage.log_command(command, ''.join(logged), returncode)
+    
+    if returncode != 0:
+        click.echo(f"{FAILURE}Command failed with exit code {returncode}{Style.RESET_ALL}")
     else:
-        click.echo(f"{Fore.GREEN}✅ Command completed successfully{Style.RESET_ALL}")
+        click.echo(f"{SUCCESS}Command completed successfully{Style.RESET_ALL}")
 
 # ============================================================================
 # Project Workspace Commands
@@ -371,7 +426,7 @@ def init(force):
         
         config = workspace.init_project_workspace(project_root, force=force)
         
-        click.echo(f"\n{Fore.GREEN}✅ Initialized DevKit workspace!{Style.RESET_ALL}\n")
+        click.echo(f"\n{SUCCESS}Initialized DevKit workspace!{Style.RESET_ALL}\n")
         click.echo(f"Project: {config['project_name']}")
         click.echo(f"Type: {config['project_type']}")
         click.echo(f"Location: {project_root}/.devkit/\n")
@@ -392,39 +447,86 @@ def logs():
 
 
 @logs.command('analyze')
-@click.argument('logfile', required=False)
-def logs_analyze(logfile):
-    """Analyze log file for errors and crashes
+@click.argument('logfiles', nargs=-1)
+@click.option('--json', 'as_json', is_flag=True, help='Print patterns and analysis as JSON')
+def logs_analyze(logfiles, as_json):
+    """Analyze log files for errors and crashes
+    
+    Several files are analyzed concurrently.
     
     Examples:
       devkit logs analyze app.log
+      devkit logs analyze api.log worker.log
+      devkit logs analyze app.log --json > report.json
       cat error.log | devkit logs analyze
     """
+    # Progress goes to stderr in JSON mode so stdout stays parseable
     try:
-        if logfile:
-            click.echo(f"{Fore.CYAN}📄 Reading: {logfile}{Style.RESET_ALL}\n")
-            log_content = log_analyzer.read_log_file(logfile)
+        if len(logfiles) > 1:
+            import asyncio
+            
+            excerpts = []
+            for logfile in logfiles:
+                click.echo(f"{Fore.CYAN}📄 Reading: {logfile}{Style.RESET_ALL}", err=as_json)
+                excerpts.append(log_analyzer.read_log_excerpt(logfile))
+            
+            context = workspace.get_project_context()
+            
+            click.echo(f"\n{Fore.CYAN}🤖 Analyzing {len(logfiles)} logs with AI...{Style.RESET_ALL}\n", err=as_json)
+            analyses = asyncio.run(log_analyzer.analyze_logs_batch(
+                [content for content, _ in excerpts], context,
+                truncated=[was_truncated for _, was_truncated in excerpts]
+            ))
+            
+            results = []
+            for logfile, analysis in zip(logfiles, analyses):
+                patterns = log_analyzer.extract_error_patterns_from_file(logfile)
+                if as_json:
+                    results.append({'source': logfile, 'patterns': patterns, 'analysis': analysis})
+                    continue
+                click.echo(f"\n{Fore.CYAN}📄 {logfile}{Style.RESET_ALL}")
+                click.echo(log_analyzer.format_analysis_output(analysis, patterns))
+            
+            if as_json:
+                click.echo(log_analyzer.format_analysis_json(results))
+            return
+        
+        if logfiles:
+            logfile = logfiles[0]
+            click.echo(f"{Fore.CYAN}📄 Reading: {logfile}{Style.RESET_ALL}\n", err=as_json)
+            # Only the excerpt sent to the AI is held in memory; stats are streamed
+            log_content, truncated = log_analyzer.read_log_excerpt(logfile)
         else:
-            click.echo(f"{Fore.CYAN}📄 Reading from stdin...{Style.RESET_ALL}\n")
-            log_content = log_analyzer.read_stdin()
+            click.echo(f"{Fore.CYAN}📄 Reading from stdin...{Style.RESET_ALL}\n", err=as_json)
+            log_content, truncated = log_analyzer.read_stdin(), None
         
         if not log_content.strip():
-            click.echo(f"{Fore.RED}❌ Empty log{Style.RESET_ALL}")
+            click.echo(f"{FAILURE}Empty log{Style.RESET_ALL}", err=as_json)
             return
         
-        patterns = log_analyzer.extract_error_patterns(log_content)
+        if logfiles:
+            patterns = log_analyzer.extract_error_patterns_from_file(logfiles[0])
+        else:
+            patterns = log_analyzer.extract_error_patterns(log_content)
         context = workspace.get_project_context()
         
-        click.echo(f"{Fore.CYAN}🤖 Analyzing with AI...{Style.RESET_ALL}\n")
-        analysis = log_analyzer.analyze_log_with_ai(log_content, context)
+        click.echo(f"{Fore.CYAN}🤖 Analyzing with AI...{Style.RESET_ALL}\n", err=as_json)
+        analysis = log_analyzer.analyze_log_with_ai(log_content, context, truncated)
+        
+        if as_json:
+            source = logfiles[0] if logfiles else '-'
+            click.echo(log_analyzer.format_analysis_json(
+                [{'source': source, 'patterns': patterns, 'analysis': analysis}]
+            ))
+            return
         
         output = log_analyzer.format_analysis_output(analysis, patterns)
         click.echo(output)
     
     except RuntimeError as e:
-        click.echo(f"{Fore.RED}❌ {e}{Style.RESET_ALL}")
+        click.echo(f"{FAILURE}{e}{Style.RESET_ALL}", err=as_json)
     except Exception as e:
-        click.echo(f"{Fore.RED}❌ Analysis failed: {e}{Style.RESET_ALL}")
+        click.echo(f"{FAILURE}Analysis failed: {e}{Style.RESET_ALL}", err=as_json)
         
 # ============================================================================
 # AI Commands
@@ -456,7 +558,11 @@ def ask(query):
                 if click.confirm(f"\n💾 Save this as a snippet?", default=False):
                     name = click.prompt("Snippet name", type=str)
                     snippets = storage.load_snippets()
-                    snippets[name] = command
+                    snippets[name] = {
+                        'command': command,
+                        'tags': [],
+                        'created': datetime.now().isoformat()
+                    }
                     storage.save_snippets(snippets)
                     click.echo(f"Saved as '{name}'")
                 break
@@ -480,10 +586,7 @@ def explain(command):
     
     explanation = ai.explain_command(command_str)
     
-    click.echo("=" * 70)
-    click.echo(explanation)
-    click.echo("=" * 70)
-    click.echo()
+    click.echo(f"{RULE}\n{explanation}\n{RULE}\n")
 
 
 # ============================================================================
@@ -505,13 +608,15 @@ def commit(ai_mode, edit, signoff, amend, no_verify):
       devkit commit --ai -e      # AI + edit
       devkit commit --amend      # Amend previous commit
     """
+    # Only the commands that shell out pay for these imports
+    import subprocess
     import tempfile
     
     # Check git repo
     try:
         subprocess.run(["git", "rev-parse", "--git-dir"], capture_output=True, check=True)
     except subprocess.CalledProcessError:
-        click.echo(f"{Fore.RED}❌ Not in a git repository!{Style.RESET_ALL}")
+        click.echo(f"{FAILURE}Not in a git repository!{Style.RESET_ALL}")
         return
     
     # Get staged files for preview
@@ -535,7 +640,7 @@ def commit(ai_mode, edit, signoff, amend, no_verify):
         diff = result.stdout
         
         if not diff:
-            click.echo(f"{Fore.RED}❌ No diff{Style.RESET_ALL}")
+            click.echo(f"{FAILURE}No diff{Style.RESET_ALL}")
             return
         
         commit_msg = ai.generate_commit_message(diff)
@@ -547,22 +652,10 @@ def commit(ai_mode, edit, signoff, amend, no_verify):
         # Interactive mode
         click.echo(f"\n{Fore.CYAN}📝 Conventional Commit Helper{Style.RESET_ALL}\n")
         
-        types = {
-            '1': ('feat', '✨ New feature'),
-            '2': ('fix', '🐛 Bug fix'),
-            '3': ('docs', '📝 Documentation'),
-            '4': ('style', '💄 Code style'),
-            '5': ('refactor', '♻️  Refactoring'),
-            '6': ('test', '✅ Tests'),
-            '7': ('chore', '🔧 Maintenance')
-        }
-        
-        click.echo("Select type:")
-        for key, (value, desc) in types.items():
-            click.echo(f"  {key}. {value:10} - {desc}")
+        click.echo(_COMMIT_TYPE_MENU)
         
         type_choice = click.prompt("\nType", default='1')
-        commit_type = types.get(type_choice, types['1'])[0]
+        commit_type = _COMMIT_TYPES.get(type_choice, _COMMIT_TYPES['1'])[0]
         
         scope = click.prompt("Scope (optional)", default="", show_default=False)
         description = click.prompt("Description", type=str)
@@ -583,7 +676,7 @@ def commit(ai_mode, edit, signoff, amend, no_verify):
         
     # Preview
     click.echo(f"\n{Fore.CYAN}📋 Preview:{Style.RESET_ALL}")
-    click.echo("=" * 70)
+    click.echo(RULE)
     click.echo(f"{Fore.WHITE}Message: {commit_msg}{Style.RESET_ALL}\n")
     click.echo(f"{Fore.YELLOW}Staged files:{Style.RESET_ALL}")
     for line in staged_files.split('\n'):
@@ -593,11 +686,10 @@ def commit(ai_mode, edit, signoff, amend, no_verify):
             file = '\t'.join(parts[1:])
             color = Fore.GREEN if status == 'A' else Fore.YELLOW if status == 'M' else Fore.RED
             click.echo(f"  {color}{status}{Style.RESET_ALL} {file}")
-    click.echo("=" * 70 + "\n")
+    click.echo(RULE + "\n")
     
     # Edit option
     if edit or click.confirm("Edit message?", default=False):
-        import os
         with tempfile.NamedTemporaryFile(mode='w+', suffix='.txt', delete=False) as f:
             f.write(commit_msg)
             temp_path = f.name
@@ -611,7 +703,7 @@ def commit(ai_mode, edit, signoff, amend, no_verify):
         os.unlink(temp_path)
         
         if not commit_msg:
-            click.echo(f"{Fore.RED}❌ Empty message{Style.RESET_ALL}")
+            click.echo(f"{FAILURE}Empty message{Style.RESET_ALL}")
             return
         
         click.echo(f"\n{Fore.CYAN}Updated: {commit_msg}{Style.RESET_ALL}\n")
@@ -620,140 +712,13 @@ def commit(ai_mode, edit, signoff, amend, no_verify):
     if click.confirm(f"{Fore.GREEN}Proceed?{Style.RESET_ALL}", default=True):
         try:
             subprocess.run(git_cmd, check=True)
-            click.echo(f"\n{Fore.GREEN}✅ Committed!{Style.RESET_ALL}")
+            click.echo(f"\n{SUCCESS}Committed!{Style.RESET_ALL}")
             storage.log_command(f"git commit -m \"{commit_msg}\"", "Committed", 0)
         except subprocess.CalledProcessError as e:
-            click.echo(f"{Fore.RED}❌ Failed: {e}{Style.RESET_ALL}")
+            click.echo(f"{FAILURE}Failed: {e}{Style.RESET_ALL}")
     else:
         click.echo(f"{Fore.YELLOW}❌ Cancelled{Style.RESET_ALL}")
 
-'''@cli.command()
-@click.option('--ai', 'ai_mode', is_flag=True, help='Use AI to generate commit message from diff')
-def commit(ai_mode):
-    """Create a conventional commit message
-    
-    Interactive mode (default): Prompts for type, scope, description
-    AI mode (--ai): Analyzes git diff and generates message
-    
-    Example: devkit commit
-    Example: devkit commit --ai
-    """
-    # Check if we're in a git repo
-    try:
-        subprocess.run(
-            ["git", "rev-parse", "--git-dir"],
-            capture_output=True,
-            check=True
-        )
-    except subprocess.CalledProcessError:
-        click.echo("❌ Not in a git repository!")
-        return
-    
-    if ai_mode:
-        # AI-powered commit
-        click.echo("\n🤖 Generating commit message from your changes...\n")
-        
-        # Get git diff
-        try:
-            result = subprocess.run(
-                ["git", "diff", "--staged"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            diff = result.stdout
-            if not diff:
-                click.echo("❌ No staged changes found.")
-                click.echo("Run 'git add <files>' first, then try again.\n")
-                return
-            
-            # Generate commit message with AI
-            commit_msg = ai.generate_commit_message(diff)
-            
-            if commit_msg.startswith("❌"):
-                click.echo(commit_msg)
-                return
-            
-            click.echo("📋 AI-generated commit message:")
-            click.echo(f"   {commit_msg}\n")
-            
-            if click.confirm("Use this commit message?", default=True):
-                try:
-                    subprocess.run(
-                        ["git", "commit", "-m", commit_msg],
-                        check=True
-                    )
-                    click.echo("✅ Commit created successfully!")
-                    storage.log_command(f"git commit -m \"{commit_msg}\"", "Commit created", 0)
-                except subprocess.CalledProcessError as e:
-                    click.echo(f"❌ Git commit failed: {e}")
-            else:
-                click.echo("❌ Commit cancelled")
-        
-        except Exception as e:
-            click.echo(f"❌ Error: {e}")
-        
-        return
-    
-    # Interactive mode (original)
-    click.echo("\n📝 Conventional Commit Helper\n")
-    
-    # Commit type
-    click.echo("Select commit type:")
-    types = {
-        '1': 'feat',
-        '2': 'fix',
-        '3': 'docs',
-        '4': 'style',
-        '5': 'refactor',
-        '6': 'test',
-        '7': 'chore'
-    }
-    
-    for key, value in types.items():
-        descriptions = {
-            'feat': '✨ New feature',
-            'fix': '🐛 Bug fix',
-            'docs': '📝 Documentation',
-            'style': '💄 Code style/formatting',
-            'refactor': '♻️  Code refactoring',
-            'test': '✅ Tests',
-            'chore': '🔧 Maintenance'
-        }
-        click.echo(f"  {key}. {value:10} - {descriptions[value]}")
-    
-    type_choice = click.prompt("\nType", type=str, default='1')
-    commit_type = types.get(type_choice, 'feat')
-    
-    # Scope (optional)
-    scope = click.prompt("Scope (optional, press Enter to skip)", default="", show_default=False)
-    
-    # Description
-    description = click.prompt("Short description", type=str)
-    
-    # Build commit message
-    if scope:
-        commit_msg = f"{commit_type}({scope}): {description}"
-    else:
-        commit_msg = f"{commit_type}: {description}"
-    
-    # Preview
-    click.echo(f"\n📋 Commit message:")
-    click.echo(f"   {commit_msg}\n")
-    
-    # Confirm
-    if click.confirm("Create this commit?", default=True):
-        try:
-            subprocess.run(
-                ["git", "commit", "-m", commit_msg],
-                check=True
-            )
-            click.echo("✅ Commit created successfully!")
-            storage.log_command(f"git commit -m \"{commit_msg}\"", "Commit created", 0)
-        except subprocess.CalledProcessError as e:
-            click.echo(f"❌ Git commit failed: {e}")
-    else:
-        click.echo("❌ Commit cancelled")'''
 
 
 # ============================================================================
@@ -817,7 +782,7 @@ def config(api_key):
         click.echo("✅ API key saved to ~/.devkit/config.json")
     else:
         click.echo("\n⚙️  Current Configuration:")
-        click.echo("=" * 50)
+        click.echo(SHORT_RULE)
         
         config_data = storage.load_config()
         api_key_stored = config_data.get('api_key')
@@ -825,7 +790,6 @@ def config(api_key):
         if api_key_stored:
             click.echo(f"API Key: {api_key_stored[:20]}... (stored)")
         else:
-            import os
             env_key = os.getenv("GEMINI_API_KEY")
             if env_key:
                 click.echo(f"API Key: {env_key[:20]}... (from environment)")
@@ -834,7 +798,7 @@ def config(api_key):
         
         click.echo(f"\nHistory logging: {'Enabled' if config_data.get('time_travel_enabled', True) else 'Disabled'}")
         click.echo(f"Max history: {config_data.get('max_history', 100)} commands")
-        click.echo("\n" + "=" * 50)
+        click.echo("\n" + SHORT_RULE)
         click.echo("\nTo set API key: devkit config --api-key <your-key>")
         click.echo("Or set environment variable: export GEMINI_API_KEY=<your-key>\n")
 
@@ -843,11 +807,10 @@ def config(api_key):
 def status():
     """Show DevKit status and statistics"""
     click.echo("\n📊 DevKit Status")
-    click.echo("=" * 70)
+    click.echo(RULE)
     
     # Snippets
-    snippets = storage.load_snippets()
-    click.echo(f"\n📝 Snippets: {len(snippets)} saved")
+    click.echo(f"\n📝 Snippets: {len(storage.load_snippet_columns())} saved")
     
     # History
     history = storage.load_history()
@@ -870,7 +833,59 @@ def status():
         click.echo(f"🤖 AI Features: ❌ Disabled (no API key)")
         click.echo("   Set API key: devkit config --api-key <key>")
     
-    click.echo("\n" + "=" * 70 + "\n")
+    click.echo("\n" + RULE + "\n")
+
+
+# ============================================================================
+# Cache Commands
+# ============================================================================
+
+@cli.group()
+def cache():
+    """Manage the AI response cache
+    
+    Repeated AI prompts are answered from ~/.devkit/cache/ instead of the API.
+    Use 'devkit --no-cache <command>' to bypass it for a single run.
+    """
+    pass
+
+
+@cache.command('clear')
+def cache_clear():
+    """Remove all cached AI responses"""
+    removed = ai_cache.get_cache().clear()
+    click.echo(f"{SUCCESS}Cleared {removed} cached response(s){Style.RESET_ALL}")
+
+
+@cache.command('warm')
+@click.option('--force', is_flag=True, help='Warm even if it already ran this week')
+def cache_warm(force):
+    """Pre-fill the cache with explanations of your snippets and history
+    
+    Afterwards 'devkit explain <cmd>' answers instantly for those commands.
+    Runs at most once a week unless --force is given.
+    """
+    if not AI_AVAILABLE:
+        click.echo("❌ AI features are not available - google-generativeai package not installed")
+        return
+    
+    if not storage.get_api_key():
+        click.echo(f"{Fore.RED}{ai.NO_API_KEY_MESSAGE}{Style.RESET_ALL}")
+        return
+    
+    if not force and not ai_cache.warm_due():
+        click.echo("Cache was warmed within the last week. Use --force to run again.")
+        return
+    
+    commands = [data.get('command', '') for data in storage.load_snippets().values()]
+    commands += [entry['command'] for entry in storage.load_history()]
+    
+    click.echo(f"\n🔥 Warming cache from {len(commands)} snippets and history entries...\n")
+    cached = ai.warm_explain_cache(commands)
+    if cached:
+        ai_cache.mark_warmed()
+    
+    click.echo(f"{SUCCESS}Cached {cached} new explanation(s){Style.RESET_ALL}")
 
 
 # ============================================================================
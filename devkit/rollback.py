@@ -3,18 +3,28 @@ Emergency rollback module
 Detects dangerous commands and suggests rollback
 """
 
+import re
 from typing import List, Dict, Any
-from .storage import load_history
+from .storage import history_keyword_stats, load_history_keyword_index, load_history_tail
 import click
 
+# Optional C-accelerated multi-keyword matching
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 # Optional AI features
 try:
-    from .ai import suggest_rollback
-    AI_AVAILABLE = True
+    from .ai import suggest_rollback, AI_AVAILABLE
 except ImportError:
     AI_AVAILABLE = False
 
 
+# Horizontal rule framing command output
+RULE = "=" * 70
+
+
 # Keywords that indicate potentially dangerous operations
 DANGEROUS_KEYWORDS = [
     'deploy', 'push', 'delete', 'drop', 'rm', 'remove',
@@ -24,20 +34,76 @@ DANGEROUS_KEYWORDS = [
 ]
 
 
+_KEYWORD_ORDER = {keyword: i for i, keyword in enumerate(DANGEROUS_KEYWORDS)}
+
+# Keywords that are usually the command itself; a command starting with one
+# is dangerous without scanning the rest of it
+_FIRST_TOKEN_DANGER = frozenset(('rm', 'prune', 'kill', 'reboot', 'shutdown', 'destroy'))
+
+# Fallback matcher: one alternation, longest keywords first so each position
+# reports e.g. 'production' rather than 'prod'
+_DANGER_RE = re.compile('|'.join(
+    re.escape(keyword) for keyword in sorted(DANGEROUS_KEYWORDS, key=len, reverse=True)
+))
+
+# Zero-width variant that tries every position, so overlapping hits are kept
+_DANGER_AT_RE = re.compile(f'(?=({_DANGER_RE.pattern}))')
+
+# Keywords found inside longer keywords ('prod' in 'production'), which the
+# longest-first match at a position hides
+_CONTAINED_KEYWORDS = {
+    keyword: [other for other in DANGEROUS_KEYWORDS if other != keyword and other in keyword]
+    for keyword in DANGEROUS_KEYWORDS
+}
+
+
+def _build_keyword_automaton():
+    """Aho-Corasick automaton over DANGEROUS_KEYWORDS, or None without pyahocorasick"""
+    if ahocorasick is None:
+        return None
+    
+    automaton = ahocorasick.Automaton()
+    for keyword in DANGEROUS_KEYWORDS:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+
 def is_dangerous_command(command: str) -> bool:
     """Check if a command is potentially dangerous"""
+    words = command.split(None, 1)
+    if words and words[0].lower() in _FIRST_TOKEN_DANGER:
+        return True
+    
     command_lower = command.lower()
-    return any(keyword in command_lower for keyword in DANGEROUS_KEYWORDS)
+    if _KEYWORD_AUTOMATON is not None:
+        return next(_KEYWORD_AUTOMATON.iter(command_lower), None) is not None
+    return _DANGER_RE.search(command_lower) is not None
+
+
+def dangerous_keywords(command: str) -> List[str]:
+    """Dangerous keywords contained in a command, in DANGEROUS_KEYWORDS order"""
+    command_lower = command.lower()
+    if _KEYWORD_AUTOMATON is not None:
+        found = {keyword for _, keyword in _KEYWORD_AUTOMATON.iter(command_lower)}
+    else:
+        found = set(_DANGER_AT_RE.findall(command_lower))
+        for keyword in list(found):
+            found.update(_CONTAINED_KEYWORDS[keyword])
+    return sorted(found, key=_KEYWORD_ORDER.__getitem__)
+
+
+def load_dangerous_history_index() -> Dict[str, Any]:
+    """History keyword index whose hits come from dangerous_keywords()"""
+    return load_history_keyword_index(dangerous_keywords, DANGEROUS_KEYWORDS)
 
 
 def find_recent_dangerous_commands(limit: int = 10) -> List[Dict[str, Any]]:
     """Find recent dangerous commands in history"""
-    history = load_history()
-    
-    if not history:
-        return []
-    
-    recent = history[-limit:]
+    recent = load_history_tail(limit)
     dangerous = [entry for entry in recent if is_dangerous_command(entry['command'])]
     
     return dangerous
@@ -54,15 +120,16 @@ def show_panic_mode() -> None:
         click.echo("You're probably fine! 😅\n")
         return
     
-    click.echo("⚠️  Recent potentially dangerous commands:")
-    click.echo("=" * 70)
-    
+    # Build the listing and write it with one echo
+    parts = ["⚠️  Recent potentially dangerous commands:\n", RULE, "\n"]
     for i, entry in enumerate(dangerous, 1):
-        click.echo(f"\n{i}. {entry['command']}")
-        click.echo(f"   Time: {entry['timestamp']}")
-        click.echo(f"   Status: {'✅ Success' if entry['exit_code'] == 0 else '❌ Failed'}")
-    
-    click.echo("\n" + "=" * 70)
+        parts.append(
+            f"\n{i}. {entry['command']}\n"
+            f"   Time: {entry['timestamp']}\n"
+            f"   Status: {'✅ Success' if entry['exit_code'] == 0 else '❌ Failed'}\n"
+        )
+    parts.append("\n" + RULE)
+    click.echo(''.join(parts))
     
     # Ask AI for rollback suggestions if available
     if AI_AVAILABLE and click.confirm("\n🤖 Get AI-powered rollback suggestions?", default=True):
@@ -70,9 +137,7 @@ def show_panic_mode() -> None:
         
         suggestions = suggest_rollback(dangerous)
         
-        click.echo("=" * 70)
-        click.echo(suggestions)
-        click.echo("=" * 70)
+        click.echo(f"{RULE}\n{suggestions}\n{RULE}")
         
         click.echo("\n⚠️  WARNING: Review these suggestions carefully before running!")
         click.echo("Always test rollback in staging first if possible.\n")
@@ -123,31 +188,23 @@ def quick_rollback_suggestions(command: str) -> None:
 
 def show_dangerous_patterns() -> None:
     """Show patterns of dangerous commands in history"""
-    history = load_history()
+    # Counts come from the history index, so only new log lines are scanned
+    total_count, dangerous_count, keyword_counts = history_keyword_stats(
+        load_dangerous_history_index(), dangerous_keywords
+    )
     
-    if not history:
+    if not total_count:
         click.echo("No history available.")
         return
     
-    # Count dangerous commands
-    dangerous_count = sum(1 for entry in history if is_dangerous_command(entry['command']))
-    total_count = len(history)
-    
     percentage = (dangerous_count / total_count * 100) if total_count > 0 else 0
     
     click.echo(f"\n📊 Dangerous Command Statistics:")
-    click.echo("=" * 70)
+    click.echo(RULE)
     click.echo(f"Total commands: {total_count}")
     click.echo(f"Dangerous commands: {dangerous_count} ({percentage:.1f}%)")
     
     # Most common dangerous keywords
-    keyword_counts = {}
-    for entry in history:
-        if is_dangerous_command(entry['command']):
-            for keyword in DANGEROUS_KEYWORDS:
-                if keyword in entry['command'].lower():
-                    keyword_counts[keyword] = keyword_counts.get(keyword, 0) + 1
-    
     if keyword_counts:
         click.echo("\nMost common risky operations:")
         sorted_keywords = sorted(keyword_counts.items(), key=lambda x: x[1], reverse=True)
@@ -0,0 +1,66 @@
+"""
+Snippet index module for DevKit
+In-memory trie over snippet tokens, so substring lookups skip the token scan
+"""
+
+from typing import Dict, Set
+
+# Suffixes are indexed this many characters deep; longer lookups are cut to
+# this length and return a superset, which callers verify anyway
+MAX_DEPTH = 24
+
+_EMPTY: frozenset = frozenset()
+
+
+class TrieNode:
+    """One character step, holding every snippet name reachable below it"""
+
+    __slots__ = ('children', 'names')
+
+    def __init__(self):
+        self.children: Dict[str, 'TrieNode'] = {}
+        self.names: Set[str] = set()
+
+
+class SnippetTrie:
+    """Suffix trie over the token -> snippet names index
+
+    Every suffix of every token is inserted and each node records the names
+    below it, so the snippets with a token containing a string are found in
+    O(len(string)) steps instead of a substring check against every token.
+    """
+
+    def __init__(self, tokens: Dict[str, Set[str]]):
+        self.root = TrieNode()
+        self.tokens = tokens
+        for token, names in tokens.items():
+            self.insert(token, names)
+
+    def insert(self, token: str, names: Set[str]) -> None:
+        """Index names under every suffix of token"""
+        for start in range(len(token)):
+            node = self.root
+            for char in token[start:start + MAX_DEPTH]:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = TrieNode()
+                child.names |= names
+                node = child
+
+    def prefix_lookup(self, prefix: str) -> Set[str]:
+        """Names of snippets with a token that contains prefix (do not mutate)"""
+        node = self.root
+        for char in prefix[:MAX_DEPTH]:
+            node = node.children.get(char)
+            if node is None:
+                return _EMPTY
+        return node.names
+
+    def exact_lookup(self, token: str) -> Set[str]:
+        """Names of snippets with exactly this token (do not mutate)"""
+        return self.tokens.get(token, _EMPTY)
+
+
+def build_index(tokens: Dict[str, Set[str]]) -> SnippetTrie:
+    """Build the trie from a token -> snippet names index"""
+    return SnippetTrie(tokens)
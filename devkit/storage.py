@@ -3,61 +3,464 @@ Storage module for DevKit
 Handles all data persistence (snippets, history, config)
 """
 
+import atexit
+import bisect
+import hashlib
 import json
+import mmap
+import os
+import re
+from array import array
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .snippet_index import SnippetTrie, build_index
 
 # Configuration
 DEVKIT_DIR = Path.home() / ".devkit"
 SNIPPETS_FILE = DEVKIT_DIR / "snippets.json"
-HISTORY_FILE = DEVKIT_DIR / "history.json"
+SNIPPET_INDEX_FILE = DEVKIT_DIR / "snippet_index.json"
+HISTORY_FILE = DEVKIT_DIR / "history.jsonl"
+LEGACY_HISTORY_FILE = DEVKIT_DIR / "history.json"
+HISTORY_INDEX_FILE = DEVKIT_DIR / "history_index.json"
+HISTORY_KEYWORD_INDEX_FILE = DEVKIT_DIR / "history_keywords.json"
 CONFIG_FILE = DEVKIT_DIR / "config.json"
 
 # Ensure devkit directory exists
 DEVKIT_DIR.mkdir(exist_ok=True)
 
 
+def json_loads(raw: bytes) -> Any:
+    """Parse JSON bytes (orjson when installed)
+    
+    Both parsers raise json.JSONDecodeError subclasses on bad input.
+    """
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def json_load_file(path) -> Any:
+    """Parse a JSON file, letting orjson read the memory-mapped bytes directly"""
+    with open(path, 'rb') as f:
+        if orjson is None or os.fstat(f.fileno()).st_size == 0:
+            return json_loads(f.read())
+        
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+
+
+def json_dumps(data: Any) -> bytes:
+    """Serialize to indented UTF-8 JSON bytes (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def json_dumps_compact(data: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes, for files only devkit reads"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def json_dump_stream(mapping: Dict[str, Any], f) -> None:
+    """Write a dict to a binary file one entry at a time
+    
+    Produces the same text as json_dumps(mapping) without ever holding the
+    whole serialized document in memory.
+    """
+    if not mapping:
+        f.write(b'{}')
+        return
+    
+    separator = b'{\n  '
+    for key, value in mapping.items():
+        f.write(separator)
+        f.write(json_dumps(key))
+        f.write(b': ')
+        f.write(json_dumps(value).replace(b'\n', b'\n  '))
+        separator = b',\n  '
+    f.write(b'\n}')
+
+
 # ============================================================================
 # Snippet Storage
 # ============================================================================
 
+# (path, mtime_ns, size), parsed snippets and the views derived from them
+# (see _snippet_view), reused while the file is unchanged
+_snippets_cache: tuple | None = None
+
+# (path, mtime_ns, size) and blake2b digest of the snippets file as last read or written
+_snippets_digest: tuple | None = None
+
+
+def _digest(raw: bytes) -> bytes:
+    """Short content hash used to detect no-op saves"""
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+
+def _stat_key(path: Path) -> tuple | None:
+    """(path, mtime_ns, size) of a file, or None if it does not exist"""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+# path -> ((path, mtime_ns, size), parsed contents) for files read via _read_cached
+_file_cache: Dict[Path, tuple] = {}
+
+
+def _read_cached(path: Path, parse: Callable[[bytes], Any]) -> Any:
+    """Parse a file, reusing the last result while its mtime and size are unchanged
+    
+    Raises FileNotFoundError if the file does not exist. The cached value is
+    shared between calls, so callers must copy it before mutating.
+    """
+    key = _stat_key(path)
+    if key is None:
+        raise FileNotFoundError(path)
+    
+    cached = _file_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    
+    value = parse(path.read_bytes())
+    _file_cache[path] = (key, value)
+    return value
+
+
+def _write_atomic(path: Path, raw: bytes, durable: bool = False) -> None:
+    """Replace a file's contents via a temp file, so readers never see a partial write
+    
+    With durable=True the temp file is fsync'd before the rename, so the new
+    contents also survive a power loss; that costs a disk flush per write.
+    """
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(raw)
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    # Coarse mtimes could hide a same-size rewrite from the stat check
+    _file_cache.pop(path, None)
+
+
+def _write_atomic_if_changed(path: Path, raw: bytes, durable: bool = False) -> bool:
+    """_write_atomic(), skipped when the file already holds exactly these bytes
+    
+    Reading a small file back is much cheaper than the temp file, rename
+    (and fsync) of a rewrite; returns whether anything was written.
+    """
+    try:
+        if path.read_bytes() == raw:
+            return False
+    except FileNotFoundError:
+        pass
+    _write_atomic(path, raw, durable=durable)
+    return True
+
+
+def write_json_atomic(path: Path, data: Any, durable: bool = False) -> None:
+    """Encode data as indented JSON and swap it into place atomically"""
+    _write_atomic(path, json_dumps(data), durable=durable)
+
+
+_SNIPPET_FIELDS = frozenset(('command', 'tags', 'created'))
+
+
+def _convert_legacy_snippets(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Handle legacy format (string values) and fill in missing fields"""
+    now = datetime.now().isoformat()
+    converted_data = {}
+    for name, value in data.items():
+        if isinstance(value, str):
+            # Legacy format: convert to new format
+            converted_data[name] = {
+                'command': value,
+                'tags': [],
+                'created': now
+            }
+        else:
+            # New format: ensure all required fields exist
+            converted_data[name] = {
+                'command': value.get('command', ''),
+                'tags': value.get('tags', []),
+                'created': value.get('created', now)
+            }
+    return converted_data
+
+
 def load_snippets() -> Dict[str, Dict[str, Any]]:
-    """Load snippets from JSON file with support for tags"""
-    if not SNIPPETS_FILE.exists():
+    """Load snippets from JSON file with support for tags
+    
+    Returns a fresh top-level dict each call, so callers may add or remove
+    entries before save_snippets() without touching the cached copy.
+    """
+    global _snippets_cache, _snippets_digest
+    
+    cache_key = _stat_key(SNIPPETS_FILE)
+    if cache_key is None:
         return {}
+    if _snippets_cache is not None and _snippets_cache[0] == cache_key:
+        return dict(_snippets_cache[1])
     
     try:
-        with open(SNIPPETS_FILE, 'r') as f:
-            data = json.load(f)
-            
-            # Handle legacy format (string values) and new format (dict values)
-            converted_data = {}
-            for name, value in data.items():
-                if isinstance(value, str):
-                    # Legacy format: convert to new format
-                    converted_data[name] = {
-                        'command': value,
-                        'tags': [],
-                        'created': datetime.now().isoformat()
-                    }
-                else:
-                    # New format: ensure all required fields exist
-                    converted_data[name] = {
-                        'command': value.get('command', ''),
-                        'tags': value.get('tags', []),
-                        'created': value.get('created', datetime.now().isoformat())
-                    }
-            
-            return converted_data
+        raw = SNIPPETS_FILE.read_bytes()
+        _snippets_digest = (cache_key, _digest(raw))
+        data = json_loads(raw)
+        
+        # Files written by save_snippets() are already complete; only legacy
+        # (string) or partial entries need converting
+        if all(type(value) is dict and _SNIPPET_FIELDS <= value.keys()
+               for value in data.values()):
+            converted_data = data
+        else:
+            converted_data = _convert_legacy_snippets(data)
+        
+        _snippets_cache = (cache_key, converted_data, {})
+        return dict(converted_data)
     except json.JSONDecodeError:
         return {}
 
 
 def save_snippets(snippets: Dict[str, Dict[str, Any]]) -> None:
-    """Save snippets to JSON file"""
-    with open(SNIPPETS_FILE, 'w') as f:
-        json.dump(snippets, f, indent=2)
+    """Save snippets to JSON file
+    
+    The file is compact JSON (no indentation), which is smaller to write and
+    faster to parse; `snippet export` still writes indented JSON for people.
+    Nothing is written when the file already holds exactly these snippets.
+    The write goes through a temp file and a rename, so an interrupted save
+    never truncates snippets.json; single-snippet edits are cheap to redo, so
+    they skip the fsync that save_snippets_durable() pays for.
+    """
+    _save_snippets(snippets, durable=False)
+
+
+def save_snippets_durable(snippets: Dict[str, Dict[str, Any]]) -> None:
+    """Save snippets crash-safely, for bulk changes that would be hard to redo
+    
+    Like save_snippets(), but the temp file is fsync'd before the rename, so
+    the new snippets also survive a power loss.
+    """
+    _save_snippets(snippets, durable=True)
+
+
+def _save_snippets(snippets: Dict[str, Dict[str, Any]], durable: bool) -> None:
+    """Write snippets.json (unless unchanged) and refresh the token index"""
+    global _snippets_cache, _snippets_digest
+    raw = json_dumps_compact(snippets)
+    digest = _digest(raw)
+    
+    if (_snippets_digest is not None and _snippets_digest[1] == digest
+            and _snippets_digest[0] == _stat_key(SNIPPETS_FILE)):
+        return
+    
+    _write_atomic(SNIPPETS_FILE, raw, durable=durable)
+    _snippets_digest = (_stat_key(SNIPPETS_FILE), digest)
+    # Values may still be in legacy form here, so let the next load normalize them
+    _snippets_cache = None
+    
+    _save_snippet_index(build_snippet_index(snippets))
+
+
+def _search_fields(name: str, data: Dict[str, Any]) -> Dict[str, str | Set[str]]:
+    """Lower-cased name and tag set of one snippet
+    
+    Commands are only matched through the search blob, which already holds
+    them lower-cased, so no second copy is made here.
+    """
+    return {
+        'name_lc': name.lower(),
+        'tags_lc': {tag.lower() for tag in data.get('tags', [])},
+    }
+
+
+def _snippet_view(view: str, build: Callable[[Dict[str, Any]], Any]) -> Any:
+    """Return a derived view of the snippets, built at most once per parse"""
+    snippets = load_snippets()
+    
+    if _snippets_cache is None:
+        return build(snippets)
+    
+    _, data, views = _snippets_cache
+    if view not in views:
+        views[view] = build(data)
+    return views[view]
+
+
+def load_snippet_search_fields() -> Dict[str, Dict[str, str | Set[str]]]:
+    """Lower-cased name and tags per snippet, computed once per parse of the file
+    
+    Kept in memory next to the parsed snippets rather than written to
+    snippets.json, so exports and hand edits never see derived fields.
+    """
+    return _snippet_view('fields', lambda data: {
+        name: _search_fields(name, value) for name, value in data.items()
+    })
+
+
+class Snippets:
+    """Column-oriented (struct-of-arrays) view of the snippet store
+    
+    Bulk commands walk plain parallel lists instead of pulling the same keys
+    out of one dict per snippet. The on-disk format is unchanged.
+    """
+    
+    __slots__ = ('names', 'commands', 'tags', 'created', '_positions')
+    
+    def __init__(self, snippets: Dict[str, Dict[str, Any]]):
+        self.names: List[str] = list(snippets)
+        self.commands: List[str] = [data['command'] for data in snippets.values()]
+        self.tags: List[List[str]] = [data['tags'] for data in snippets.values()]
+        self.created: List[str] = [data['created'] for data in snippets.values()]
+        self._positions: Optional[Dict[str, int]] = None
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def position(self, name: str) -> Optional[int]:
+        """Column index of a snippet, or None if it does not exist"""
+        if self._positions is None:
+            self._positions = {n: i for i, n in enumerate(self.names)}
+        return self._positions.get(name)
+    
+    def rows(self, positions: Optional[Iterable[int]] = None) -> Iterator[tuple]:
+        """(name, command, tags) for every snippet, or for the given positions"""
+        if positions is None:
+            return zip(self.names, self.commands, self.tags)
+        return ((self.names[i], self.commands[i], self.tags[i]) for i in positions)
+
+
+def load_snippet_columns() -> Snippets:
+    """Column view of the snippets, built once per parse of the file"""
+    return _snippet_view('columns', Snippets)
+
+
+def load_rendered_snippets(style: str, render: Callable[[str, str, List[str]], str]) -> List[str]:
+    """Display text of every snippet in column order, rendered once per parse
+    
+    render(name, command, tags) formats one snippet; style names the output
+    mode (e.g. colored or plain) so both can be cached side by side. The
+    rendered text stays in memory and is never written to snippets.json.
+    """
+    return _snippet_view(f'rendered:{style}', lambda data: [
+        render(name, value['command'], value['tags']) for name, value in data.items()
+    ])
+
+
+# Separators inside the search blob: between a snippet's fields, and between snippets
+_FIELD_SEP = '\x1e'
+_RECORD_SEP = '\x1f'
+
+
+def _build_search_blob(snippets: Dict[str, Dict[str, Any]]) -> tuple:
+    """Join every snippet's lower-cased name, command and tags into one string
+    
+    Returns the blob and the start offset of each snippet's record, in store
+    order, so a match position maps back to a snippet with a bisect.
+    """
+    records = []
+    starts = array('q')
+    offset = 0
+    
+    for name, data in snippets.items():
+        record = _FIELD_SEP.join((name, data['command'], ' '.join(data['tags']))).lower()
+        records.append(record)
+        starts.append(offset)
+        offset += len(record) + 1
+    
+    return _RECORD_SEP.join(records), starts
+
+
+def search_snippets(query: str) -> List[int]:
+    """Column positions of snippets whose name, command or tags contain query
+    
+    The token trie narrows the search to a few candidate records; queries
+    without word characters fall back to one str.find() pass over the joined
+    blob, which skips to the next record after each hit.
+    """
+    query_lc = query.lower()
+    blob, starts = _snippet_view('search_blob', _build_search_blob)
+    
+    if not query_lc:
+        return list(range(len(starts)))
+    if _FIELD_SEP in query_lc or _RECORD_SEP in query_lc:
+        return []
+    
+    candidates = snippet_search_candidates(query)
+    if candidates is not None:
+        # Only the records the trie could not rule out need a find()
+        columns = load_snippet_columns()
+        positions = sorted(columns.position(name) for name in candidates)
+        ends = [start - 1 for start in starts[1:]] + [len(blob)]
+        return [
+            position for position in positions
+            if blob.find(query_lc, starts[position], ends[position]) != -1
+        ]
+    
+    positions = []
+    pos = blob.find(query_lc)
+    while pos != -1:
+        position = bisect.bisect_right(starts, pos) - 1
+        positions.append(position)
+        if position + 1 == len(starts):
+            break
+        pos = blob.find(query_lc, starts[position + 1])
+    
+    return positions
+
+
+# One exported txt snippet: "# name", an optional "# Tags: a, b" line, then
+# command lines up to the next "# " header
+_TXT_SNIPPET_RE = re.compile(
+    rb'^# (?P<name>[^\r\n]*)\r?\n'
+    rb'(?:# Tags: ?(?P<tags>[^\r\n]*)\r?\n)?'
+    rb'(?P<body>(?:(?!# )[^\r\n]*(?:\r?\n|\Z))*)',
+    re.MULTILINE
+)
+
+
+def load_snippets_txt(path) -> Dict[str, Dict[str, Any]]:
+    """Parse snippets written by `devkit snippet export --format txt`
+    
+    The file is memory-mapped and split by a single compiled regex, so only
+    the matched names, tags and commands are ever decoded.
+    """
+    snippets = {}
+    
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return snippets
+        
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            created = datetime.now().isoformat()
+            for match in _TXT_SNIPPET_RE.finditer(mm):
+                name = match['name'].decode('utf-8', errors='replace').strip()
+                lines = match['body'].decode('utf-8', errors='replace').splitlines()
+                command = '\n'.join(line for line in lines if line.strip())
+                if not name or not command:
+                    continue
+                
+                tags = match['tags'].decode('utf-8', errors='replace') if match['tags'] else ''
+                snippets[name] = {
+                    'command': command,
+                    'tags': [tag.strip() for tag in tags.split(',') if tag.strip()],
+                    'created': created,
+                }
+    
+    return snippets
 
 
 def load_snippets_legacy() -> Dict[str, str]:
@@ -78,46 +481,330 @@ def save_snippets_legacy(snippets: Dict[str, str]) -> None:
     save_snippets(converted_snippets)
 
 
+# ============================================================================
+# Snippet Search Index
+# ============================================================================
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lower-case word tokens"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def build_snippet_index(snippets: Dict[str, Any]) -> Dict[str, Set[str]]:
+    """Map every token of a snippet's name, command and tags to snippet names"""
+    index: Dict[str, Set[str]] = {}
+    
+    for name, value in snippets.items():
+        # Legacy entries are bare command strings
+        if isinstance(value, str):
+            text = f"{name} {value}"
+        else:
+            text = f"{name} {value.get('command', '')} {' '.join(value.get('tags', []))}"
+        
+        for token in tokenize(text):
+            index.setdefault(token, set()).add(name)
+    
+    return index
+
+
+def _snippets_stamp() -> Optional[List[int]]:
+    """mtime/size of the snippets file, used to tell if the index is stale"""
+    try:
+        stat = SNIPPETS_FILE.stat()
+    except FileNotFoundError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _save_snippet_index(index: Dict[str, Set[str]]) -> None:
+    """Persist the index, stamped with the snippets file it was built from"""
+    # Derived data: a torn write fails to parse and is simply rebuilt
+    SNIPPET_INDEX_FILE.write_bytes(json_dumps_compact({
+        'stamp': _snippets_stamp(),
+        'tokens': {token: sorted(names) for token, names in index.items()},
+    }))
+
+
+def load_snippet_index() -> Dict[str, Set[str]]:
+    """Load the token -> snippet names index, rebuilding it if missing or stale"""
+    try:
+        data = json_loads(SNIPPET_INDEX_FILE.read_bytes())
+        if data.get('stamp') == _snippets_stamp():
+            return {token: set(names) for token, names in data['tokens'].items()}
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+    
+    # Snippets were edited outside save_snippets() (or the index is new)
+    index = build_snippet_index(load_snippets())
+    _save_snippet_index(index)
+    return index
+
+
+def load_snippet_trie() -> SnippetTrie:
+    """Suffix trie over the token index, built once per parse of the snippets file"""
+    return _snippet_view('trie', lambda data: build_index(load_snippet_index()))
+
+
+def _names_by_lowercase(data: Dict[str, Any]) -> Dict[str, Set[str]]:
+    """Lower-cased snippet name -> the snippet names that lower-case to it"""
+    names: Dict[str, Set[str]] = {}
+    for name in data:
+        names.setdefault(name.lower(), set()).add(name)
+    return names
+
+
+def snippet_names_containing(text: str) -> List[str]:
+    """Names of snippets whose name contains text (case-insensitive), in store order
+    
+    Walks a suffix trie over the whole lower-cased names, built once per
+    parse of the snippets file, instead of checking every name.
+    """
+    text_lc = text.lower()
+    columns = load_snippet_columns()
+    if not text_lc:
+        return list(columns.names)
+    
+    trie = _snippet_view('name_trie', lambda data: build_index(_names_by_lowercase(data)))
+    # The trie only indexes MAX_DEPTH characters deep, so confirm each hit
+    return sorted((name for name in trie.prefix_lookup(text_lc) if text_lc in name.lower()),
+                  key=columns.position)
+
+
+def snippet_search_candidates(query: str) -> Optional[Set[str]]:
+    """Names of snippets that may contain query as a substring
+    
+    Inner query tokens must appear whole in a matching snippet, while the
+    first and last may be cut off, so they only need to be part of some
+    indexed token. Returns None if the query has no word characters and
+    every snippet must be checked.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+    
+    trie = load_snippet_trie()
+    candidates = None
+    
+    for position, token in enumerate(tokens):
+        if 0 < position < len(tokens) - 1:
+            postings = trie.exact_lookup(token)
+        else:
+            postings = trie.prefix_lookup(token)
+        
+        # The trie's own sets are shared, so always intersect into a new one
+        candidates = set(postings) if candidates is None else candidates & postings
+        if not candidates:
+            break
+    
+    return candidates
+
+
 # ============================================================================
 # Command History Storage (for time-travel debugging)
 # ============================================================================
 
-def log_command(command: str, output: str = "", exit_code: int = 0) -> None:
-    """Log a command to history for time-travel debugging"""
-    history = load_history()
+# Characters of command output kept per history entry
+HISTORY_OUTPUT_LIMIT = 1000
+
+# Entries returned by load_history(); the log is compacted once it holds twice this
+MAX_HISTORY = 100
+
+# Logged commands are buffered and appended in batches of this size (and at exit)
+HISTORY_FLUSH_THRESHOLD = 8
+
+_history_buffer: List[Dict[str, Any]] = []
+
+# Bytes read per step when scanning history.jsonl backwards for its last entries
+HISTORY_TAIL_BLOCK = 8192
+
+
+def _json_line(record: Any) -> bytes:
+    """Serialize one record as a compact JSON line"""
+    return json_dumps_compact(record) + b'\n'
+
+
+# Set once the legacy history.json check has run in this process
+_history_migrated = False
+
+
+def _migrate_legacy_history() -> None:
+    """Convert history.json (one JSON list) into the append-only history.jsonl
+    
+    Only the first call in a process looks at the disk; history reads and
+    writes call this every time.
+    """
+    global _history_migrated
+    if _history_migrated:
+        return
+    _history_migrated = True
+    
+    if HISTORY_FILE.exists() or not LEGACY_HISTORY_FILE.exists():
+        return
+    
+    try:
+        history = json_loads(LEGACY_HISTORY_FILE.read_bytes())
+    except json.JSONDecodeError:
+        history = []
+    
+    _write_atomic(HISTORY_FILE, b''.join(_json_line(entry) for entry in history[-MAX_HISTORY:]))
+    LEGACY_HISTORY_FILE.unlink()
+
+
+def _read_history_file() -> List[Dict[str, Any]]:
+    """Every entry in history.jsonl, skipping lines cut short by a crash
+    
+    The list is cached until the file changes; do not mutate it.
+    """
+    _migrate_legacy_history()
+    
+    try:
+        return _read_cached(HISTORY_FILE, _parse_history)
+    except FileNotFoundError:
+        return []
+
+
+def _parse_history(raw: bytes) -> List[Dict[str, Any]]:
+    """Decode history.jsonl, dropping lines that are not valid JSON"""
+    history = []
+    for line in raw.splitlines():
+        try:
+            history.append(json_loads(line))
+        except json.JSONDecodeError:
+            continue
+    return history
+
+
+def flush_history() -> None:
+    """Append buffered history entries to disk (also runs at interpreter exit)"""
+    if not _history_buffer:
+        return
+    
+    _migrate_legacy_history()
+    HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(HISTORY_FILE, 'ab') as f:
+        f.write(b''.join(_json_line(entry) for entry in _history_buffer))
+        size = f.tell()
+    _history_buffer.clear()
+    _file_cache.pop(HISTORY_FILE, None)
+    
+    # Compaction needs a full read, so only consider it once the file is big
+    # enough to hold 2x MAX_HISTORY typical (~256 byte) entries
+    if size > 2 * MAX_HISTORY * 256:
+        _rotate_history()
+
+
+def _rotate_history() -> None:
+    """Cut history.jsonl down to its last MAX_HISTORY lines once it holds twice that
+    
+    Lines are counted and kept byte-for-byte, so rotation never decodes or
+    re-encodes an entry.
+    """
+    raw = HISTORY_FILE.read_bytes()
+    if raw.count(b'\n') <= 2 * MAX_HISTORY:
+        return
+    
+    # With the usual trailing newline the last piece is empty, leaving MAX_HISTORY lines
+    kept = raw.rsplit(b'\n', MAX_HISTORY + 1)[1:]
+    _write_atomic(HISTORY_FILE, b'\n'.join(kept))
+
+
+atexit.register(flush_history)
+
+
+def log_command(command: str, output: str = "", exit_code: int = 0,
+                timestamp: Optional[str] = None) -> None:
+    """Log a command to history for time-travel debugging
+    
+    Callers logging a batch of commands can pass one pre-formatted
+    isoformat() timestamp instead of formatting the clock per entry.
+    """
+    if len(output) > HISTORY_OUTPUT_LIMIT:
+        output = output[:HISTORY_OUTPUT_LIMIT]  # Limit output size
     
     entry = {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": timestamp or datetime.now().isoformat(),
         "command": command,
-        "output": output[:1000],  # Limit output size
+        "output": output,
         "exit_code": exit_code
     }
     
-    history.append(entry)
-    
-    # Keep only last 100 commands to avoid huge files
-    if len(history) > 100:
-        history = history[-100:]
-    
-    save_history(history)
+    _history_buffer.append(entry)
+    if len(_history_buffer) >= HISTORY_FLUSH_THRESHOLD:
+        flush_history()
 
 
 def load_history() -> List[Dict[str, Any]]:
-    """Load command history"""
-    if not HISTORY_FILE.exists():
-        return []
+    """Load command history (the last MAX_HISTORY entries, oldest first)
+    
+    The file is parsed at most once while it is unchanged, and unflushed
+    entries come from the in-memory buffer.
+    """
+    wanted = MAX_HISTORY - len(_history_buffer)
+    if wanted <= 0:
+        return _history_buffer[-MAX_HISTORY:]
+    return _read_history_file()[-wanted:] + _history_buffer
+
+
+def _read_history_tail(count: int) -> List[Dict[str, Any]]:
+    """The last count entries of history.jsonl, reading the file from the end
     
+    Blocks are read backwards until enough complete lines have been decoded,
+    so the cost depends on count rather than on the size of the log.
+    """
+    _migrate_legacy_history()
+    
+    cached = _file_cache.get(HISTORY_FILE)
+    if cached is not None and cached[0] == _stat_key(HISTORY_FILE):
+        return cached[1][-count:]
+    
+    entries = []
     try:
-        with open(HISTORY_FILE, 'r') as f:
-            return json.load(f)
-    except json.JSONDecodeError:
+        f = open(HISTORY_FILE, 'rb')
+    except FileNotFoundError:
+        return entries
+    
+    with f:
+        position = f.seek(0, os.SEEK_END)
+        partial = b''
+        while position > 0 and len(entries) < count:
+            size = min(HISTORY_TAIL_BLOCK, position)
+            position -= size
+            f.seek(position)
+            lines = (f.read(size) + partial).split(b'\n')
+            # Unless this block starts the file, its first line continues in the previous one
+            partial = lines.pop(0) if position > 0 else b''
+            
+            for line in reversed(lines):
+                try:
+                    entries.append(json_loads(line))
+                except json.JSONDecodeError:
+                    continue
+                if len(entries) == count:
+                    break
+    
+    entries.reverse()
+    return entries
+
+
+def load_history_tail(count: int) -> List[Dict[str, Any]]:
+    """The last count entries of load_history(), without decoding the rest"""
+    count = min(count, MAX_HISTORY)
+    if count <= 0:
         return []
+    
+    buffered = _history_buffer[-count:]
+    if len(buffered) == count:
+        return buffered
+    return _read_history_tail(count - len(buffered)) + buffered
 
 
 def save_history(history: List[Dict[str, Any]]) -> None:
-    """Save command history"""
-    with open(HISTORY_FILE, 'w') as f:
-        json.dump(history, f, indent=2)
+    """Replace the whole command history (no write if it is already exactly that)"""
+    _history_buffer.clear()
+    _write_atomic_if_changed(HISTORY_FILE, b''.join(_json_line(entry) for entry in history[-MAX_HISTORY:]))
 
 
 def clear_history() -> None:
@@ -125,41 +812,215 @@ def clear_history() -> None:
     save_history([])
 
 
+# ============================================================================
+# History Index
+# ============================================================================
+
+def _empty_history_index(tag: Any) -> Dict[str, Any]:
+    """Index of an empty history.jsonl"""
+    return {'end': 0, 'anchor': '', 'clean': True, 'tag': tag, 'lines': 0, 'hits': []}
+
+
+# Bytes before the indexed end of history.jsonl that must be unchanged for
+# the index to be extended rather than rebuilt
+HISTORY_INDEX_ANCHOR = 64
+
+
+def _history_anchor(f, end: int) -> str:
+    """Digest of the bytes just before end, to detect a rewritten log"""
+    start = max(0, end - HISTORY_INDEX_ANCHOR)
+    f.seek(start)
+    return _digest(f.read(end - start)).hex()
+
+
+def _index_history_lines(index: Dict[str, Any], f,
+                         extract: Callable[[Dict[str, Any], int], Any]) -> None:
+    """Add the lines from index['end'] onwards to the index
+    
+    extract(entry, offset) returns what to record for a line, or None.
+    """
+    offset = index['end']
+    f.seek(offset)
+    
+    for raw in f:
+        index['clean'] = raw.endswith(b'\n')
+        try:
+            entry = json_loads(raw)
+        except json.JSONDecodeError:
+            offset += len(raw)
+            continue
+        
+        line = index['lines']
+        index['lines'] += 1
+        # Other valid JSON still counts as a line (load_history() keeps it)
+        # but has nothing to index
+        if isinstance(entry, dict):
+            value = extract(entry, offset)
+            if value is not None:
+                index['hits'].append([line, value])
+        offset += len(raw)
+    
+    index['end'] = offset
+    index['anchor'] = _history_anchor(f, offset)
+
+
+def _load_line_index(path: Path, tag: Any,
+                     extract: Callable[[Dict[str, Any], int], Any]) -> Dict[str, Any]:
+    """Load the index at path, first indexing lines appended to history.jsonl
+    
+    Lines appended since the index was written are indexed on the next call,
+    so reports never re-scan the whole log; a compaction or other rewrite
+    (detected by the bytes just before the indexed end changing) or a
+    different tag rebuilds it. Buffered entries that are not flushed yet are
+    not included.
+    """
+    _migrate_legacy_history()
+    
+    try:
+        f = open(HISTORY_FILE, 'rb')
+    except FileNotFoundError:
+        return _empty_history_index(tag)
+    
+    with f:
+        size = os.fstat(f.fileno()).st_size
+        try:
+            index = json_loads(path.read_bytes())
+            reusable = (index['tag'] == tag and index['end'] <= size
+                        and index['anchor'] == _history_anchor(f, index['end']))
+        except (OSError, ValueError, KeyError, TypeError):
+            reusable = False
+        
+        if reusable and index['end'] == size:
+            return index
+        if not reusable or not index['clean']:
+            # Appending to an unterminated last line would merge the two
+            index = _empty_history_index(tag)
+        
+        _index_history_lines(index, f, extract)
+    
+    path.write_bytes(json_dumps_compact(index))
+    return index
+
+
+def _failure_offset(entry: Dict[str, Any], offset: int) -> Optional[int]:
+    """Byte offset of a failed entry's line"""
+    return offset if entry.get('exit_code', 0) != 0 else None
+
+
+def load_history_index() -> Dict[str, Any]:
+    """Byte offsets of the failed entries in history.jsonl (history_index.json)"""
+    return _load_line_index(HISTORY_INDEX_FILE, 'failures', _failure_offset)
+
+
+def load_history_keyword_index(keywords_of: Callable[[str], List[str]],
+                               keywords: Sequence[str]) -> Dict[str, Any]:
+    """keywords_of() hits for every line of history.jsonl (history_keywords.json)
+    
+    keywords identifies the matcher: changing it rebuilds the index.
+    """
+    def extract(entry: Dict[str, Any], offset: int) -> Optional[List[str]]:
+        return keywords_of(entry.get('command', '')) or None
+    
+    return _load_line_index(HISTORY_KEYWORD_INDEX_FILE, list(keywords), extract)
+
+
+def _history_window(index: Dict[str, Any]) -> Tuple[int, List[Dict[str, Any]]]:
+    """First indexed line inside load_history()'s window, and the buffered entries in it"""
+    total = index['lines'] + len(_history_buffer)
+    first = max(0, total - MAX_HISTORY)
+    return first, _history_buffer[max(0, first - index['lines']):]
+
+
+def load_history_failures(index: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Failed entries of load_history(), read at the offsets in load_history_index()"""
+    first, buffered = _history_window(index)
+    failures = []
+    
+    offsets = [offset for line, offset in index['hits'] if line >= first]
+    if offsets:
+        with open(HISTORY_FILE, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                failures.append(json_loads(f.readline()))
+    
+    failures.extend(entry for entry in buffered if entry.get('exit_code', 0) != 0)
+    return failures
+
+
+def history_keyword_stats(index: Dict[str, Any],
+                          keywords_of: Callable[[str], List[str]]) -> Tuple[int, int, Dict[str, int]]:
+    """(entries, dangerous entries, keyword counts) over load_history()'s window
+    
+    index comes from load_history_keyword_index() with the same keywords_of.
+    Keyword counts are in first-seen order, matching a scan of the window.
+    """
+    first, buffered = _history_window(index)
+    total = index['lines'] - first + len(buffered)
+    
+    hits = [found for line, found in index['hits'] if line >= first]
+    hits.extend(filter(None, (keywords_of(entry.get('command', '')) for entry in buffered)))
+    
+    keyword_counts: Dict[str, int] = {}
+    for found in hits:
+        for keyword in found:
+            keyword_counts[keyword] = keyword_counts.get(keyword, 0) + 1
+    return total, len(hits), keyword_counts
+
+
 # ============================================================================
 # Config Storage
 # ============================================================================
 
 def load_config() -> Dict[str, Any]:
-    """Load configuration"""
-    if not CONFIG_FILE.exists():
+    """Load configuration (re-parsed only when config.json changes)"""
+    try:
+        return dict(_read_cached(CONFIG_FILE, json_loads))
+    except FileNotFoundError:
         return {
             "api_key": None,
             "time_travel_enabled": True,
             "max_history": 100
         }
-    
-    try:
-        with open(CONFIG_FILE, 'r') as f:
-            return json.load(f)
     except json.JSONDecodeError:
         return {}
 
 
 def save_config(config: Dict[str, Any]) -> None:
-    """Save configuration"""
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config, f, indent=2)
+    """Save configuration (no write, and no fsync, if it is unchanged)"""
+    # The API key lives here and cannot be rebuilt, so this write is durable
+    _write_atomic_if_changed(CONFIG_FILE, json_dumps(config), durable=True)
+    
+    # The stored key may have changed
+    invalidate_api_key()
+
+
+# Marks _api_key as not looked up yet, since None is a valid (missing) result
+_API_KEY_UNSET: Any = object()
+
+# API key resolved by get_api_key(), kept for the rest of the process; a
+# missing key is remembered too, so repeated misses skip the lookup
+_api_key: Any = _API_KEY_UNSET
 
 
 def get_api_key() -> str | None:
     """Get API key from config or environment"""
-    import os
+    global _api_key
+    
+    if _api_key is not _API_KEY_UNSET:
+        return _api_key
     
     # Try environment variable first
     api_key = os.getenv("GEMINI_API_KEY")
-    if api_key:
-        return api_key
+    if not api_key:
+        # Try config file
+        config = load_config()
+        api_key = config.get("api_key")
     
-    # Try config file
-    config = load_config()
-    return config.get("api_key")
\ No newline at end of file
+    _api_key = api_key or None
+    return _api_key
+
+
+def invalidate_api_key() -> None:
+    """Forget the cached API key so the next lookup re-reads it"""
+    global _api_key
+    _api_key = _API_KEY_UNSET
\ No newline at end of file
@@ -3,51 +3,69 @@ Time-travel debugging module
 Allows rewinding and analyzing command history
 """
 
-from datetime import datetime
+import re
 from typing import List, Dict, Any
-from .storage import load_history, log_command
+from .storage import (load_history, load_history_failures, load_history_index,
+                      load_history_tail, log_command)
 import click
 
 # Optional AI features
 try:
-    from .ai import analyze_history
-    AI_AVAILABLE = True
+    from .ai import analyze_history, AI_AVAILABLE
 except ImportError:
     AI_AVAILABLE = False
 
 
+# Horizontal rule framing command output
+RULE = "=" * 70
+
+# Date and time (to the second) at the start of an isoformat() timestamp
+_ISO_TIMESTAMP_RE = re.compile(r'(\d{4}-\d{2}-\d{2})T(\d{2}:\d{2}:\d{2})')
+
+
+def _format_timestamp(timestamp: str, with_date: bool = True) -> str:
+    """'YYYY-MM-DD HH:MM:SS' (or just the time) sliced out of an isoformat() string
+    
+    Anything that does not look like one is shown unchanged.
+    """
+    match = _ISO_TIMESTAMP_RE.match(timestamp)
+    if not match:
+        return timestamp
+    return f"{match[1]} {match[2]}" if with_date else match[2]
+
+
 def show_history(limit: int = 10) -> None:
     """Display recent command history"""
-    history = load_history()
-    
-    if not history:
+    if limit > 0:
+        # Only the shown entries are decoded, read from the end of the log
+        recent = load_history_tail(limit)
+    else:
+        # history[-0:] is the whole list, which --limit 0 has always shown
+        recent = load_history()[-limit:]
+    
+    if not recent:
         click.echo("No command history yet. Run some commands first!")
         return
     
-    recent = history[-limit:]
-    
-    click.echo(f"\n⏰ Command History (last {len(recent)} commands):")
-    click.echo("=" * 70)
+    parts = [f"\n⏰ Command History (last {len(recent)} commands):\n", RULE]
     
     for i, entry in enumerate(recent, 1):
         timestamp = entry['timestamp']
         command = entry['command']
         exit_code = entry['exit_code']
         
-        # Format timestamp
-        try:
-            dt = datetime.fromisoformat(timestamp)
-            time_str = dt.strftime("%H:%M:%S")
-        except:
-            time_str = timestamp
+        time_str = _format_timestamp(timestamp, with_date=False)
         
         # Status indicator
         status = "✅" if exit_code == 0 else "❌"
         
-        click.echo(f"\n{i}. [{time_str}] {status} {command}")
+        parts.append(f"\n\n{i}. [{time_str}] {status} {command}")
         
         if exit_code != 0:
-            click.echo(f"   Exit code: {exit_code}")
+            parts.append(f"\n   Exit code: {exit_code}")
+    
+    # One write for the whole listing
+    click.echo(''.join(parts))
 
 
 def analyze_recent_history() -> None:
@@ -56,7 +74,8 @@ def analyze_recent_history() -> None:
         click.echo("❌ AI features are not available - anthropic package not installed")
         return
         
-    history = load_history()
+    # The analysis prompt only covers the last 10 commands
+    history = load_history_tail(10)
     
     if not history:
         click.echo("No command history to analyze yet.")
@@ -67,16 +86,12 @@ def analyze_recent_history() -> None:
     # Get AI analysis
     analysis = analyze_history(history)
     
-    click.echo("=" * 70)
-    click.echo(analysis)
-    click.echo("=" * 70)
+    click.echo(f"{RULE}\n{analysis}\n{RULE}")
 
 
 def find_failures() -> List[Dict[str, Any]]:
-    """Find all failed commands in history"""
-    history = load_history()
-    failures = [entry for entry in history if entry['exit_code'] != 0]
-    return failures
+    """Find all failed commands in history (read by offset from the history index)"""
+    return load_history_failures(load_history_index())
 
 
 def show_failures() -> None:
@@ -87,44 +102,40 @@ def show_failures() -> None:
         click.echo("✅ No failed commands in history!")
         return
     
-    click.echo(f"\n❌ Found {len(failures)} failed command(s):")
-    click.echo("=" * 70)
+    parts = [f"\n❌ Found {len(failures)} failed command(s):\n", RULE]
     
     for i, entry in enumerate(failures, 1):
-        timestamp = entry['timestamp']
-        command = entry['command']
+        timestamp = entry.get('timestamp', '')
+        command = entry.get('command', '')
         exit_code = entry['exit_code']
         
-        try:
-            dt = datetime.fromisoformat(timestamp)
-            time_str = dt.strftime("%Y-%m-%d %H:%M:%S")
-        except:
-            time_str = timestamp
+        time_str = _format_timestamp(timestamp)
         
-        click.echo(f"\n{i}. [{time_str}]")
-        click.echo(f"   Command: {command}")
-        click.echo(f"   Exit code: {exit_code}")
+        parts.append(f"\n\n{i}. [{time_str}]\n   Command: {command}\n   Exit code: {exit_code}")
         
         if entry.get('output'):
-            click.echo(f"   Output: {entry['output'][:200]}...")
+            parts.append(f"\n   Output: {entry['output'][:200]}...")
+    
+    # One write for the whole listing
+    click.echo(''.join(parts))
 
 
 def rewind_to_state(steps: int = 1) -> None:
     """Show what commands to run to rewind N steps"""
-    history = load_history()
+    recent = load_history_tail(steps)
     
-    if len(history) < steps:
-        click.echo(f"Only {len(history)} commands in history, can't rewind {steps} steps.")
+    if len(recent) < steps:
+        click.echo(f"Only {len(recent)} commands in history, can't rewind {steps} steps.")
         return
     
-    click.echo(f"\n⏪ To rewind {steps} step(s), you might need to:")
-    click.echo("=" * 70)
-    
-    recent = history[-steps:]
+    lines = [f"\n⏪ To rewind {steps} step(s), you might need to:", RULE]
     
     for entry in reversed(recent):
         command = entry['command']
-        click.echo(f"\nUndo: {command}")
-        click.echo("  (No automatic undo available - review and revert manually)")
+        lines.append(f"\nUndo: {command}")
+        lines.append("  (No automatic undo available - review and revert manually)")
+    
+    lines.append("\n💡 Use 'devkit panic' for AI-powered rollback suggestions!")
     
-    click.echo("\n💡 Use 'devkit panic' for AI-powered rollback suggestions!")
\ No newline at end of file
+    # One write for the whole listing
+    click.echo('\n'.join(lines))
\ No newline at end of file
@@ -3,85 +3,101 @@ Workspace module for DevKit
 Handles project-aware features and context detection
 """
 
-import json
+import functools
 import os
 from pathlib import Path
-from typing import Dict, Any, Optional
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+from .storage import json_loads, write_json_atomic
 
 
 PROJECT_CONFIG_FILE = ".devkit/config.json"
 PROJECT_SNIPPETS_FILE = ".devkit/snippets.json"
 
+# Any of these in a directory makes it a project root
+PROJECT_MARKERS = frozenset([
+    '.git',
+    'package.json',
+    'setup.py',
+    'pyproject.toml',
+    'Cargo.toml',
+    'go.mod',
+    'pom.xml',
+    'build.gradle',
+    '.devkit'
+])
+
 
 def find_project_root() -> Optional[Path]:
     """Find project root by looking for markers like .git, package.json, etc."""
-    current = Path.cwd()
-    
-    # Look for common project markers
-    markers = [
-        '.git',
-        'package.json',
-        'setup.py',
-        'pyproject.toml',
-        'Cargo.toml',
-        'go.mod',
-        'pom.xml',
-        'build.gradle',
-        '.devkit'
-    ]
-    
-    # Walk up the directory tree
+    return _find_project_root_for(str(Path.cwd()))
+
+
+@functools.lru_cache(maxsize=8)
+def _find_project_root_for(cwd: str) -> Optional[Path]:
+    """Walk up from cwd once per process; the answer rarely changes mid-run"""
+    current = Path(cwd)
+    
+    # Walk up the directory tree, listing each level once instead of
+    # stat-ing every marker in it
     for parent in [current] + list(current.parents):
-        for marker in markers:
-            if (parent / marker).exists():
-                return parent
+        try:
+            with os.scandir(parent) as entries:
+                if not PROJECT_MARKERS.isdisjoint(entry.name for entry in entries):
+                    return parent
+        except OSError:
+            # Unreadable directories cannot be checked, so keep walking
+            continue
     
     return None
 
 
-def detect_project_type(project_root: Path) -> str:
-    """Detect project type based on files present"""
-    if (project_root / "package.json").exists():
-        return "nodejs"
-    elif (project_root / "setup.py").exists() or (project_root / "pyproject.toml").exists():
-        return "python"
-    elif (project_root / "Cargo.toml").exists():
-        return "rust"
-    elif (project_root / "go.mod").exists():
-        return "go"
-    elif (project_root / "pom.xml").exists():
-        return "java-maven"
-    elif (project_root / "build.gradle").exists():
-        return "java-gradle"
-    elif (project_root / ".git").exists():
-        return "git-repo"
-    else:
-        return "unknown"
-
-
-def get_project_name(project_root: Path, project_type: str) -> str:
-    """Extract project name from project files"""
+# Marker -> project type, in priority order; the first marker present also
+# names the file the project name is read from
+PROJECT_TYPE_MARKERS = (
+    ("package.json", "nodejs"),
+    ("pyproject.toml", "python"),
+    ("setup.py", "python"),
+    ("Cargo.toml", "rust"),
+    ("go.mod", "go"),
+    ("pom.xml", "java-maven"),
+    ("build.gradle", "java-gradle"),
+    (".git", "git-repo"),
+)
+
+
+def detect_project_info(project_root: Path) -> Tuple[str, str]:
+    """Detect project type and name with one directory listing
+    
+    Only the file of the winning marker is opened to read the name.
+    """
+    try:
+        with os.scandir(project_root) as entries:
+            names = {entry.name for entry in entries}
+    except OSError:
+        names = set()
+    
+    for marker, project_type in PROJECT_TYPE_MARKERS:
+        if marker in names:
+            return project_type, _read_project_name(project_root, marker)
+    
+    return "unknown", project_root.name
+
+
+def _read_project_name(project_root: Path, marker: str) -> str:
+    """Extract project name from the marker file, falling back to the directory name"""
     try:
-        if project_type == "nodejs":
-            with open(project_root / "package.json") as f:
-                data = json.load(f)
-                return data.get("name", project_root.name)
+        if marker == "package.json":
+            data = json_loads((project_root / marker).read_bytes())
+            return data.get("name", project_root.name)
         
-        elif project_type == "python":
-            if (project_root / "pyproject.toml").exists():
-                import toml
-                with open(project_root / "pyproject.toml") as f:
-                    data = toml.load(f)
-                    return data.get("project", {}).get("name", project_root.name)
-            elif (project_root / "setup.py").exists():
-                # Try to extract from setup.py (basic parsing)
-                return project_root.name
+        elif marker == "pyproject.toml":
+            data = _load_toml(project_root / marker)
+            return data.get("project", {}).get("name", project_root.name)
         
-        elif project_type == "rust":
-            import toml
-            with open(project_root / "Cargo.toml") as f:
-                data = toml.load(f)
-                return data.get("package", {}).get("name", project_root.name)
+        elif marker == "Cargo.toml":
+            data = _load_toml(project_root / marker)
+            return data.get("package", {}).get("name", project_root.name)
     
     except Exception:
         pass
@@ -89,6 +105,17 @@ def get_project_name(project_root: Path, project_type: str) -> str:
     return project_root.name
 
 
+def _load_toml(path: Path) -> Dict[str, Any]:
+    """Parse a TOML file with the stdlib parser (tomli before Python 3.11)"""
+    try:
+        import tomllib
+    except ImportError:
+        import tomli as tomllib
+    
+    with open(path, 'rb') as f:
+        return tomllib.load(f)
+
+
 def init_project_workspace(project_root: Path, force: bool = False) -> Dict[str, Any]:
     """Initialize .devkit directory in project root"""
     devkit_dir = project_root / ".devkit"
@@ -96,45 +123,46 @@ def init_project_workspace(project_root: Path, force: bool = False) -> Dict[str,
     if devkit_dir.exists() and not force:
         raise FileExistsError(f".devkit already exists in {project_root}")
     
-    # Create .devkit directory
+    # Create .devkit directory (a new marker, so forget memoized roots)
     devkit_dir.mkdir(exist_ok=True)
+    _find_project_root_for.cache_clear()
     
     # Detect project info
-    project_type = detect_project_type(project_root)
-    project_name = get_project_name(project_root, project_type)
+    project_type, project_name = detect_project_info(project_root)
     
     # Create project config
     config = {
         "project_name": project_name,
         "project_type": project_type,
         "project_root": str(project_root),
-        "initialized_at": __import__('datetime').datetime.now().isoformat(),
+        "initialized_at": datetime.now().isoformat(),
         "settings": {
             "auto_stage": False,
             "commit_template": None
         }
     }
     
+    # Encode first (orjson when installed), then swap the file in atomically
     config_file = devkit_dir / "config.json"
-    with open(config_file, 'w') as f:
-        json.dump(config, f, indent=2)
+    write_json_atomic(config_file, config)
     
     # Create empty snippets file
     snippets_file = devkit_dir / "snippets.json"
     if not snippets_file.exists():
-        with open(snippets_file, 'w') as f:
-            json.dump({}, f)
+        snippets_file.write_text('{}')
     
     # Add .devkit to .gitignore if in git repo
     gitignore = project_root / ".gitignore"
     if (project_root / ".git").exists():
-        gitignore_content = ""
-        if gitignore.exists():
-            gitignore_content = gitignore.read_text()
+        # One undecoded read; a missing file just means nothing is ignored yet
+        try:
+            gitignore_content = gitignore.read_bytes()
+        except FileNotFoundError:
+            gitignore_content = b""
         
-        if ".devkit/" not in gitignore_content:
-            with open(gitignore, 'a') as f:
-                f.write("\n# DevKit project workspace\n.devkit/\n")
+        if b".devkit/" not in gitignore_content:
+            with open(gitignore, 'ab') as f:
+                f.write(b"\n# DevKit project workspace\n.devkit/\n")
     
     return config
 
@@ -148,12 +176,9 @@ def load_project_config() -> Optional[Dict[str, Any]]:
     
     config_file = project_root / ".devkit" / "config.json"
     
-    if not config_file.exists():
-        return None
-    
+    # One read of the whole (small) file; a missing file is just another failure
     try:
-        with open(config_file) as f:
-            return json.load(f)
+        return json_loads(config_file.read_bytes())
     except Exception:
         return None
 
@@ -182,12 +207,8 @@ def load_project_snippets() -> Dict[str, Any]:
     
     snippets_file = project_root / ".devkit" / "snippets.json"
     
-    if not snippets_file.exists():
-        return {}
-    
     try:
-        with open(snippets_file) as f:
-            return json.load(f)
+        return json_loads(snippets_file.read_bytes())
     except Exception:
         return {}
 
@@ -203,9 +224,7 @@ def save_project_snippets(snippets: Dict[str, Any]):
     devkit_dir.mkdir(exist_ok=True)
     
     snippets_file = devkit_dir / "snippets.json"
-    
-    with open(snippets_file, 'w') as f:
-        json.dump(snippets, f, indent=2)
+    write_json_atomic(snippets_file, snippets)
 
 
 def is_in_project_workspace() -> bool:
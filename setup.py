@@ -16,9 +16,11 @@ setup(
     install_requires=[
         'click>=8.0.0',
         'colorama>=0.4.0',
+        'tomli>=1.1.0; python_version < "3.11"',
     ],
     extras_require={
-        'ai': ['google-generativeai>=0.3.0'],
+        'ai': ['google-generativeai>=0.3.0', 'aiolimiter>=1.1.0'],
+        'fast': ['orjson>=3.6.0', 'pyahocorasick>=2.0.0'],
         'dev': [
             'pytest>=7.0.0',
             'black>=22.0.0',
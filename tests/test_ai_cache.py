@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+from devkit.ai_cache import LLMCache, SemanticCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LLMCache(tmp_path / "responses.db")
+    yield cache
+    cache.close()
+
+
+def test_cache_roundtrip(cache):
+    key = LLMCache.cache_key("gemini-2.5-flash", "list files")
+    assert cache.get(key) is None
+
+    cache.set(key, "COMMAND: ls")
+    assert cache.get(key) == "COMMAND: ls"
+
+    # Same prompt for a different model must not collide
+    assert LLMCache.cache_key("other-model", "list files") != key
+
+
+def test_cache_expires_entries(cache):
+    cache.ttl = 10
+    cache.set("key", "stale")
+    cache.conn.execute("UPDATE responses SET created_at = ?", (int(time.time()) - 60,))
+
+    assert cache.get("key") is None
+
+
+def test_cache_evicts_least_recently_used(cache):
+    cache.max_entries = 2
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.conn.execute("UPDATE responses SET last_used = last_used - 100 WHERE key = 'a'")
+    cache.set("c", "3")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "2"
+    assert cache.get("c") == "3"
+
+
+def test_cache_clear(cache):
+    cache.set("a", "1")
+    cache.set("b", "2")
+    semantic = SemanticCache(cache.path)
+    semantic.add("ask", [1.0, 0.0], "1")
+    semantic.close()
+
+    # Semantic copies are removed but not counted twice
+    assert cache.clear() == 2
+    assert cache.get("a") is None
+    assert cache.conn.execute("SELECT COUNT(*) FROM semantic").fetchone()[0] == 0
+
+
+def test_semantic_cache_matches_paraphrases(tmp_path):
+    cache = SemanticCache(tmp_path / "responses.db", threshold=0.9)
+    cache.add("ask", [1.0, 0.0, 0.1], "COMMAND: ls -S")
+
+    assert cache.lookup("ask", [0.9, 0.0, 0.1]) == "COMMAND: ls -S"
+    assert cache.lookup("ask", [0.0, 1.0, 0.0]) is None
+    # Answers are never shared across prompt kinds
+    assert cache.lookup("explain", [1.0, 0.0, 0.1]) is None
+    cache.close()
@@ -0,0 +1,62 @@
+from devkit.logs import (extract_error_patterns, extract_error_patterns_parallel,
+                         read_log_excerpt, truncate_log)
+
+
+SAMPLE_LOG = """starting worker
+Traceback (most recent call last):
+  File "app.py", line 10, in main
+  File "app.py", line 4, in run
+ValueError: bad input
+  File "db.py", line 2, in connect
+  at Pool.acquire
+WARN: retrying
+  at Pool.retry
+ConnectionError: refused
+request handled
+error: disk almost full
+shutting down
+"""
+
+
+def test_parallel_extraction_matches_sequential(tmp_path):
+    logfile = tmp_path / "app.log"
+    logfile.write_text(SAMPLE_LOG * 3)
+
+    expected = extract_error_patterns(SAMPLE_LOG * 3)
+    # Enough workers that chunk boundaries fall inside stack traces
+    for workers in (1, 2, 5, 16):
+        assert extract_error_patterns_parallel(str(logfile), workers) == expected
+
+
+# Frames that also look like errors/warnings, so they only count once
+TRACE_LOG = """Traceback (most recent call last):
+error: while handling request
+  File "x"   at foo warn
+  at bar error
+  File "y", line 3
+WARN: slow
+  at baz
+plain line
+"""
+
+
+def test_parallel_extraction_splits_inside_traces(tmp_path):
+    logfile = tmp_path / "trace.log"
+    content = TRACE_LOG * 7
+    logfile.write_text(content)
+
+    expected = extract_error_patterns(content)
+    # Every worker count from 2 to 12 moves the chunk boundaries to other trace lines
+    for workers in range(2, 13):
+        assert extract_error_patterns_parallel(str(logfile), workers) == expected
+
+
+def test_file_excerpt_matches_truncate_log(tmp_path):
+    # Errors spread through a long log, so the windows compete for the budget
+    lines = [f"error: failure {i}" if i % 37 == 0 else f"request {i} ok" for i in range(3000)]
+    content = "\n".join(lines) + "\n"
+    logfile = tmp_path / "big.log"
+    logfile.write_text(content)
+
+    for max_lines in (30, 100, 500):
+        assert read_log_excerpt(str(logfile), max_lines) == truncate_log(content, max_lines)
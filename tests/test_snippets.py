@@ -2,33 +2,33 @@ import pytest
 from click.testing import CliRunner
 from pathlib import Path
 import json
-import shutil
 
+from devkit import storage
 from devkit.main import cli
-from devkit.storage import DEVKIT_DIR, SNIPPETS_FILE
+
+# Every storage path under DEVKIT_DIR, redirected per test by clean_devkit_dir
+STORAGE_FILES = ('SNIPPETS_FILE', 'SNIPPET_INDEX_FILE', 'HISTORY_FILE',
+                 'LEGACY_HISTORY_FILE', 'HISTORY_INDEX_FILE', 'HISTORY_KEYWORD_INDEX_FILE',
+                 'CONFIG_FILE')
 
 @pytest.fixture
 def runner():
     return CliRunner()
 
 @pytest.fixture
-def clean_devkit_dir():
-    # Remove test devkit directory if it exists
-    if DEVKIT_DIR.exists():
-        shutil.rmtree(DEVKIT_DIR)
-    
-    # Create fresh directory
-    DEVKIT_DIR.mkdir(exist_ok=True)
+def clean_devkit_dir(tmp_path, monkeypatch):
+    # Point storage at a fresh per-test directory instead of the real ~/.devkit
+    devkit_dir = tmp_path / '.devkit'
+    devkit_dir.mkdir()
+    monkeypatch.setattr(storage, 'DEVKIT_DIR', devkit_dir)
+    for name in STORAGE_FILES:
+        monkeypatch.setattr(storage, name, devkit_dir / getattr(storage, name).name)
     
     # Create snippets file with empty dict
-    with open(SNIPPETS_FILE, 'w') as f:
+    with open(storage.SNIPPETS_FILE, 'w') as f:
         json.dump({}, f)
     
-    yield
-    
-    # Cleanup after tests
-    if DEVKIT_DIR.exists():
-        shutil.rmtree(DEVKIT_DIR)
+    yield devkit_dir
 
 def test_save_snippet(runner, clean_devkit_dir):
     # Test saving a snippet
@@ -36,7 +36,7 @@ def test_save_snippet(runner, clean_devkit_dir):
     assert result.exit_code == 0
     
     # Verify snippet was saved with new format
-    with open(SNIPPETS_FILE, 'r') as f:
+    with open(storage.SNIPPETS_FILE, 'r') as f:
         snippets = json.load(f)
         assert 'test' in snippets
         assert snippets['test']['command'] == 'echo "test"'
@@ -60,7 +60,7 @@ def test_delete_snippet(runner, clean_devkit_dir):
     assert save_result.exit_code == 0
     
     # Verify it was saved
-    with open(SNIPPETS_FILE, 'r') as f:
+    with open(storage.SNIPPETS_FILE, 'r') as f:
         snippets = json.load(f)
         assert 'test' in snippets
     
@@ -69,7 +69,7 @@ def test_delete_snippet(runner, clean_devkit_dir):
     assert result.exit_code == 0
     
     # Verify it's gone
-    with open(SNIPPETS_FILE, 'r') as f:
+    with open(storage.SNIPPETS_FILE, 'r') as f:
         snippets = json.load(f)
         assert 'test' not in snippets
 
@@ -79,4 +79,38 @@ def test_no_ai_graceful_fallback(runner):
     result = runner.invoke(cli, ['ask', 'how to list files'], input='n\n')  # Say 'no' to saving
     assert result.exit_code == 0
     # Should either get a command suggestion OR an error message
-    assert ('COMMAND:' in result.output or 'API key not configured' in result.output)
\ No newline at end of file
+    assert ('COMMAND:' in result.output or 'API key not configured' in result.output)
+
+def test_txt_export_import_roundtrip(runner, clean_devkit_dir, tmp_path):
+    runner.invoke(cli, ['snippet', 'save', 'git-undo', 'git reset --soft HEAD~1', '--tags', 'git,undo'])
+    runner.invoke(cli, ['snippet', 'save', 'ports', 'lsof -i -P -n'])
+    export_file = tmp_path / 'snippets.txt'
+    
+    result = runner.invoke(cli, ['snippet', 'export', str(export_file), '--format', 'txt'])
+    assert result.exit_code == 0
+    
+    with open(storage.SNIPPETS_FILE, 'w') as f:
+        json.dump({}, f)
+    
+    result = runner.invoke(cli, ['snippet', 'import', str(export_file)])
+    assert 'Imported 2 snippets' in result.output
+    
+    with open(storage.SNIPPETS_FILE, 'r') as f:
+        snippets = json.load(f)
+        assert snippets['git-undo']['command'] == 'git reset --soft HEAD~1'
+        assert snippets['git-undo']['tags'] == ['git', 'undo']
+        assert snippets['ports']['command'] == 'lsof -i -P -n'
+
+def test_search_matches_inside_words(runner, clean_devkit_dir):
+    runner.invoke(cli, ['snippet', 'save', 'status', 'git status --short'])
+    runner.invoke(cli, ['snippet', 'save', 'pods', 'kubectl get pods', '--tags', 'k8s'])
+    
+    # Query cut mid-word on both ends still finds the snippet, and only it
+    result = runner.invoke(cli, ['snippet', 'search', 'it stat'])
+    assert result.exit_code == 0
+    assert 'status' in result.output
+    assert 'pods' not in result.output
+    
+    result = runner.invoke(cli, ['snippet', 'search', '8S'])
+    assert 'pods' in result.output
+    assert 'status' not in result.output